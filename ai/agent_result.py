@@ -0,0 +1,159 @@
+import os
+from array import array
+from typing import Callable, Dict, Iterable, Iterator
+
+# ===============================
+# CONSTANTS
+# ===============================
+RESTOCK_REASON = "Predicted demand exceeds current stock"
+
+
+# ===============================
+# COLUMNAR DECISIONS
+# ===============================
+class DecisionColumns:
+    """
+    Approved decisions of one cycle, stored column by column.
+
+    Numeric columns are typed arrays and string columns plain lists, so a
+    decision costs a handful of machine words instead of two dicts, a
+    uuid and an ISO string. Cycle-wide values (cycle id, intent expiry,
+    supplier wallets, INR → wei conversion) are stored once. The familiar
+    dict shape is only built at the serialization edge: `record(i)`,
+    iteration, indexing and `to_list()`.
+    """
+
+    __slots__ = (
+        "cycle_id", "valid_until", "supplier_address_map", "to_wei",
+        "product", "category", "supplier_id", "priority",
+        "predicted_7d_demand", "current_stock", "restock_quantity",
+        "supplier_cost_per_unit", "total_cost", "_intent_base", "_intent_seq",
+    )
+
+    def __init__(
+        self,
+        cycle_id: str,
+        valid_until: int,
+        supplier_address_map: Dict[str, str],
+        to_wei: Callable[[float], str],
+    ):
+        self.cycle_id = cycle_id
+        self.valid_until = valid_until
+        self.supplier_address_map = supplier_address_map
+        self.to_wei = to_wei
+
+        self.product = []
+        self.category = []
+        self.supplier_id = []
+        self.priority = array("b")
+        self.predicted_7d_demand = array("q")
+        self.current_stock = array("q")
+        self.restock_quantity = array("q")
+        self.supplier_cost_per_unit = array("d")
+        self.total_cost = array("d")
+
+        # One random draw per cycle; intent ids are base + sequence
+        self._intent_base = int.from_bytes(os.urandom(3), "big")
+        self._intent_seq = array("q")
+
+    def append(
+        self,
+        product: str,
+        category,
+        supplier_id: str,
+        priority: int,
+        predicted_7d_demand: int,
+        current_stock: int,
+        restock_quantity: int,
+        unit_cost: float,
+        total_cost: float,
+    ) -> int:
+        self.product.append(product)
+        self.category.append(category)
+        self.supplier_id.append(supplier_id)
+        self.priority.append(priority)
+        self.predicted_7d_demand.append(predicted_7d_demand)
+        self.current_stock.append(current_stock)
+        self.restock_quantity.append(restock_quantity)
+        self.supplier_cost_per_unit.append(unit_cost)
+        self.total_cost.append(total_cost)
+        self._intent_seq.append(len(self._intent_seq))
+        return len(self.product) - 1
+
+    def take(self, positions: Iterable[int]) -> "DecisionColumns":
+        """New columns holding only `positions`, in that order."""
+        subset = DecisionColumns(
+            self.cycle_id, self.valid_until, self.supplier_address_map, self.to_wei
+        )
+        subset._intent_base = self._intent_base
+        for i in positions:
+            subset.append(
+                self.product[i], self.category[i], self.supplier_id[i],
+                self.priority[i], self.predicted_7d_demand[i],
+                self.current_stock[i], self.restock_quantity[i],
+                self.supplier_cost_per_unit[i], self.total_cost[i],
+            )
+            subset._intent_seq[-1] = self._intent_seq[i]
+        return subset
+
+    # -------------------------------
+    # PAYMENT FIELDS
+    # -------------------------------
+    def intent_id(self, i: int) -> str:
+        suffix = (self._intent_base + self._intent_seq[i]) & 0xFFFFFF
+        return f"restock-{self.cycle_id}-{suffix:06x}"
+
+    def supplier_address(self, i: int) -> str:
+        return self.supplier_address_map[self.supplier_id[i]]
+
+    def amount_wei(self, i: int) -> str:
+        return self.to_wei(self.total_cost[i])
+
+    # -------------------------------
+    # SERIALIZATION EDGE
+    # -------------------------------
+    def record(self, i: int) -> dict:
+        return {
+            "product": self.product[i],
+            "category": self.category[i],
+            "supplier_id": self.supplier_id[i],
+            "priority": self.priority[i],
+            "predicted_7d_demand": self.predicted_7d_demand[i],
+            "current_stock": self.current_stock[i],
+            "restock_quantity": self.restock_quantity[i],
+            "supplier_cost_per_unit": self.supplier_cost_per_unit[i],
+            "total_cost": self.total_cost[i],
+            "reason": RESTOCK_REASON,
+            "payment_intent": {
+                "intent_id": self.intent_id(i),
+                "supplier_address": self.supplier_address(i),
+                "amount_wei": self.amount_wei(i),
+                "token": "NATIVE",
+                "valid_until": self.valid_until,
+                "reason": "AUTO_RESTOCK",
+            },
+        }
+
+    def to_list(self) -> list:
+        return [self.record(i) for i in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self.product)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self.record(i) for i in range(len(self)))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.record(i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        return self.record(key)
+
+
+def materialize(result: dict) -> dict:
+    """Agent result with decisions in their JSON (list-of-dicts) shape."""
+    decisions = result.get("decisions")
+    if isinstance(decisions, DecisionColumns):
+        return {**result, "decisions": decisions.to_list()}
+    return result
@@ -2,15 +2,21 @@
 
 import sys
 import os
-from typing import Optional, List
+import json
+import asyncio
+import hashlib
+import threading
+from collections import deque
+from typing import Optional
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-import requests
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
 from dotenv import load_dotenv
 
 # -------------------------------------------------
@@ -25,13 +31,29 @@ if str(BASE_DIR) not in sys.path:
 # -------------------------------------------------
 # INTERNAL IMPORTS
 # -------------------------------------------------
-from ai.restock_agent import run_agent
+import ai.restock_agent as restock_agent
+from ai.restock_agent import run_agent, iter_agent, shutdown_shard_pool
+from ai.agent_result import materialize
+from ai.supplier_offers import SUPPLIER_OFFER_CACHE, offer_stamp
+from ai.inventory_store import inventory_exists
+from ai.inventory_provider import INVENTORY
 from ai.default_config import DEFAULT_CONFIG
+from ai.restock_jobs import RESTOCK_JOBS, RestockJob
+from ai.cycle_runner import CycleRunner
+from ai.preview_cache import PREVIEW_CACHE
+from ai.ws_fanout import WS_FANOUT
+from ai.stock_health import STOCK_HEALTH
+from ai.dashboard_snapshot import build_snapshot, publish_snapshot
 
 from backend.config_mapper import frontend_to_agent_config
-from backend.config_store import save_config, load_config, save_stats, load_stats, save_transaction, load_transactions
-from backend.payments import send_payment
-from backend.db import supplier_inventory_collection
+from backend.config_store import (
+    save_config, load_config, load_stats, load_transactions,
+    transaction_cursor, transaction_sort_key,
+    queue_stats, queue_transaction, flush_writes,
+)
+from backend.stock_reservations import reserve_stock, release_stock
+from backend.payment_executor import PAYMENT_EXECUTOR, PAID, FAILED, CANCELLED, SKIPPED, TIMED_OUT
+from backend.db import ensure_indexes, supplier_inventory_collection
 
 from ai.notifier import send_whatsapp_message
 from ai.transactions import simulate_transaction
@@ -42,10 +64,16 @@ from ai.audit import log_event
 # GLOBAL STATE (CACHED)
 # -------------------------------------------------
 CURRENT_CONFIG: Optional[dict] = None
-TRANSACTIONS = []
+# Hot window of recent transactions; older pages come from MongoDB
+RECENT_TRANSACTIONS = 100
+MAX_TRANSACTIONS_PAGE = 500
+TRANSACTIONS = deque(maxlen=RECENT_TRANSACTIONS)
 
-INVENTORY_STATS = {"healthy": 0, "low": 0, "critical": 0}
+# Stock-health counts last pushed to dashboards (live counts: STOCK_HEALTH)
+LAST_PUSHED_STOCK_HEALTH: Optional[dict] = None
 TOTAL_SPENT_INR = 0
+# Late-payment callbacks update it from payment threads
+SPENT_LOCK = threading.Lock()
 
 # 🔥 AGENT CACHE (IMPORTANT)
 LAST_AGENT_RESULT: Optional[dict] = None
@@ -79,36 +107,19 @@ app.add_middleware(
 )
 
 # =================================================
-# WEBSOCKET MANAGER
+# WEBSOCKET FAN-OUT
 # =================================================
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception:
-                pass
-
-manager = ConnectionManager()
-
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    await WS_FANOUT.connect(websocket)
     try:
         while True:
             await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the fan-out closed an evicted socket under us
+        pass
+    finally:
+        WS_FANOUT.disconnect(websocket)
 
 # =================================================
 # STARTUP / SHUTDOWN
@@ -117,7 +128,12 @@ scheduler = BackgroundScheduler()
 
 @app.on_event("startup")
 def startup():
-    global CURRENT_CONFIG, INVENTORY_STATS, TOTAL_SPENT_INR, TRANSACTIONS
+    global CURRENT_CONFIG, TOTAL_SPENT_INR, TRANSACTIONS
+
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"⚠️ Could not ensure MongoDB indexes: {e}")
 
     saved = load_config()
     if saved:
@@ -126,16 +142,14 @@ def startup():
 
     stats = load_stats()
     TOTAL_SPENT_INR = stats.get("total_spent_inr", 0)
-    TRANSACTIONS = load_transactions(limit=100)
+    TRANSACTIONS = deque(load_transactions(limit=RECENT_TRANSACTIONS), maxlen=RECENT_TRANSACTIONS)
     print(f"💰 Loaded total spent: ₹{TOTAL_SPENT_INR}")
 
-    if OWNER_INVENTORY_CSV.exists():
-        df = pd.read_csv(OWNER_INVENTORY_CSV)
-        INVENTORY_STATS = {
-            "healthy": int((df["current_stock"] > 20).sum()),
-            "low": int(((df["current_stock"] <= 20) & (df["current_stock"] > 5)).sum()),
-            "critical": int((df["current_stock"] <= 5).sum()),
-        }
+    # Counters follow every load, restock and replayed sale from here on
+    apply_stock_health_thresholds()
+    INVENTORY.subscribe(STOCK_HEALTH, OWNER_INVENTORY_CSV)
+    if inventory_exists(OWNER_INVENTORY_CSV):
+        INVENTORY.refresh(OWNER_INVENTORY_CSV)
 
     days = CURRENT_CONFIG.get("autoRunDays", 0) if CURRENT_CONFIG else 0
     # Migrate or default: try autoRunMins, then old autoRunInterval, then 1000
@@ -151,13 +165,28 @@ def startup():
     total_seconds = (days * 86400) + (mins * 60) + secs
     if total_seconds < 1: total_seconds = 1000 * 60 # Safety fallback
 
-    scheduler.add_job(auto_run, "interval", seconds=total_seconds, id="restock_job")
+    # One instance at a time; ticks missed while the process was busy collapse into one
+    scheduler.add_job(
+        auto_run, "interval", seconds=total_seconds, id="restock_job",
+        max_instances=1, coalesce=True,
+    )
+    scheduler.add_listener(on_scheduler_miss, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+    scheduler.add_job(
+        INVENTORY.compact, "interval", hours=1, id="ledger_compaction",
+        kwargs={"csv_path": OWNER_INVENTORY_CSV},
+    )
     scheduler.start()
     print(f"🟢 Scheduler started with interval: {days}d {mins}m {secs}s ({total_seconds} seconds)")
 
 @app.on_event("shutdown")
 def shutdown():
     scheduler.shutdown()
+    RESTOCK_JOBS.shutdown(wait=True)
+    shutdown_shard_pool()
+    try:
+        flush_writes()
+    except Exception as e:
+        print(f"⚠️ Could not flush pending stats/transactions: {e}")
     print("🔴 Scheduler stopped")
 
 # =================================================
@@ -179,6 +208,7 @@ def save_agent_config(config: dict):
 
     CURRENT_CONFIG = config
     save_config(config)
+    apply_stock_health_thresholds()
 
     if old_total != new_total and new_total > 0:
         print(f"🔄 Updating scheduler interval to {new_total} seconds")
@@ -195,6 +225,31 @@ def get_final_agent_config() -> dict:
         return {**DEFAULT_CONFIG, **frontend_to_agent_config(CURRENT_CONFIG)}
     return DEFAULT_CONFIG
 
+def agent_run_options(config: dict, cycle: bool = False) -> dict:
+    """
+    run_agent execution mode from config. Only single-flight cycles may use
+    the shared incremental state; sharding takes precedence over it.
+    """
+    workers = int(config.get("agent_workers", 1))
+    return {
+        "workers": workers,
+        "shard_by": config.get("shard_by", "category"),
+        "incremental": cycle and workers <= 1 and config.get("incremental_cycles", False),
+    }
+
+def apply_stock_health_thresholds():
+    """Read just the two thresholds: the rest of a stored config may not map cleanly."""
+    config = CURRENT_CONFIG or {}
+    low = config.get("stockHealthLow")
+    critical = config.get("stockHealthCritical")
+    try:
+        STOCK_HEALTH.configure(
+            int(DEFAULT_CONFIG["stock_health_low_at"] if low is None else low),
+            int(DEFAULT_CONFIG["stock_health_critical_at"] if critical is None else critical),
+        )
+    except (TypeError, ValueError) as e:
+        print(f"⚠️ Keeping stock-health thresholds {STOCK_HEALTH.thresholds()}: {e}")
+
 # =================================================
 # HEALTH
 # =================================================
@@ -205,8 +260,7 @@ def health():
 # =================================================
 # DASHBOARD STATS (⚡ FAST)
 # =================================================
-@app.get("/api/dashboard/stats")
-def dashboard_stats():
+def budget_status() -> dict:
     total_spent_inr = int(TOTAL_SPENT_INR)
 
     monthly_budget = (
@@ -216,102 +270,272 @@ def dashboard_stats():
     )
 
     return {
-        "aiStatus": {
-            "isActive": CURRENT_CONFIG is not None,
-            "monthlyBudget": monthly_budget,
-            "budgetUsed": total_spent_inr,
-            "budgetRemaining": max(monthly_budget - total_spent_inr, 0),
-        },
-        "stockHealth": INVENTORY_STATS,
+        "isActive": CURRENT_CONFIG is not None,
+        "monthlyBudget": monthly_budget,
+        "budgetUsed": total_spent_inr,
+        "budgetRemaining": max(monthly_budget - total_spent_inr, 0),
+    }
+
+@app.get("/api/dashboard/stats")
+def dashboard_stats():
+    # Two stats; replays only ledger lines appended by other processes
+    # (simulated sales), which move the counters
+    if inventory_exists(OWNER_INVENTORY_CSV):
+        INVENTORY.refresh(OWNER_INVENTORY_CSV)
+
+    return {
+        "aiStatus": budget_status(),
+        "stockHealth": STOCK_HEALTH.counts(),
+    }
+
+# =================================================
+# AGENT STAGE TIMINGS
+# =================================================
+@app.get("/api/agent/timings")
+def agent_timings():
+    if not LAST_AGENT_RESULT:
+        return {"cycle_id": None, "timings": None}
+
+    return {
+        "cycle_id": LAST_AGENT_RESULT["cycle_id"],
+        "run_at": LAST_AGENT_RUN_AT.isoformat() if LAST_AGENT_RUN_AT else None,
+        "timings": LAST_AGENT_RESULT.get("timings"),
     }
 
 # =================================================
 # PREVIEW (CACHED — VERY IMPORTANT)
 # =================================================
+def preview_version(config: dict) -> tuple:
+    """Everything the preview depends on that can change between polls."""
+    config_key = hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+    return (
+        config_key,
+        INVENTORY.stamp(OWNER_INVENTORY_CSV),
+        SUPPLIER_OFFER_CACHE.version(supplier_inventory_collection),
+        # Previews are dry runs; only paying cycles move the cooldown clock
+        restock_agent.LAST_RESTOCK_AT,
+    )
+
 @app.get("/restock-items")
-def preview():
-    global LAST_AGENT_RESULT, LAST_AGENT_RUN_AT
+def preview(request: Request):
+    config = get_final_agent_config()
 
-    if LAST_AGENT_RESULT:
-        return LAST_AGENT_RESULT
+    def compute() -> bytes:
+        global LAST_AGENT_RESULT, LAST_AGENT_RUN_AT
 
-    LAST_AGENT_RESULT = run_agent(get_final_agent_config())
-    LAST_AGENT_RUN_AT = datetime.utcnow()
-    return LAST_AGENT_RESULT
+        LAST_AGENT_RESULT = run_agent(config, dry_run=True, **agent_run_options(config))
+        LAST_AGENT_RUN_AT = datetime.utcnow()
+        return json.dumps(jsonable_encoder(materialize(LAST_AGENT_RESULT))).encode()
+
+    entry, _ = PREVIEW_CACHE.get(preview_version(config), compute)
+
+    # Dashboard polls revalidate with the ETag and get an empty 304
+    if entry.not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    ):
+        return Response(status_code=304, headers=entry.headers())
+    return Response(entry.body, media_type="application/json", headers=entry.headers())
+
+# =================================================
+# PREVIEW (STREAMING — NDJSON)
+# =================================================
+@app.get("/restock-items/stream")
+def preview_stream():
+    """
+    One JSON object per line: a {"type": "decision", ...} line for each
+    decision as the agent approves it, then a final {"type": "summary", ...}.
+    """
+    def ndjson():
+        config = get_final_agent_config()
+        cycle = iter_agent(config, dry_run=True, **agent_run_options(config))
+        while True:
+            try:
+                decision = next(cycle)
+            except StopIteration as done:
+                yield json.dumps({"type": "summary", **done.value}) + "\n"
+                return
+            yield json.dumps({"type": "decision", **decision}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 # =================================================
 # RUN AGENT + PAYMENTS
 # =================================================
-@app.post("/run-restock")
-async def run_restock(execute_payments: bool = False):
-    global TOTAL_SPENT_INR, INVENTORY_STATS
+def publish_dashboard_delta(new_transactions: list, cycle_id: Optional[str] = None):
+    """
+    Push what a cycle changed to every dashboard, from any thread: the new
+    transactions, spend, stock-health counts when they moved, and a hint
+    that /restock-items has a new version.
+    """
+    global LAST_PUSHED_STOCK_HEALTH
+
+    event = {
+        "type": "dashboard_delta",
+        "cycle_id": cycle_id,
+        "transactions": new_transactions,
+        "spend": budget_status(),
+        "preview_changed": True,
+    }
+
+    stock_health = STOCK_HEALTH.counts()
+    if stock_health != LAST_PUSHED_STOCK_HEALTH:
+        LAST_PUSHED_STOCK_HEALTH = stock_health
+        event["stock_health"] = stock_health
+
+    WS_FANOUT.publish_threadsafe(event)
+
+def persist_buffered_writes():
+    """Flush stats/transactions; on failure they stay queued for the next flush."""
+    try:
+        flush_writes()
+    except Exception as e:
+        print(f"⚠️ Could not persist stats/transactions (kept for retry): {e}")
+
+def publish_dashboard_snapshot(result: dict, source: str):
+    """Materialize what the dashboard stats service serves; never fails a cycle."""
+    try:
+        spend = budget_status()
+        publish_snapshot(build_snapshot(
+            result,
+            stock_health=STOCK_HEALTH.counts(),
+            budget_used=spend["budgetUsed"],
+            monthly_budget=spend["monthlyBudget"],
+            source=source,
+        ))
+    except Exception as e:
+        print(f"⚠️ Could not publish dashboard snapshot: {e}")
+
+def execute_restock_cycle(job: RestockJob, execute_payments: bool = False) -> dict:
+    """
+    One full restock cycle: agent run, stock reservation, payments and
+    bookkeeping. Blocking; runs on the restock job pool.
+    """
     global LAST_AGENT_RESULT, LAST_AGENT_RUN_AT
 
-    result = run_agent(get_final_agent_config())
+    job.set_stage("agent")
+    config = get_final_agent_config()
+    # Cycles are single-flight, so they can share the incremental state.
+    # Without payments nothing is bought: keep the cooldown clock still
+    result = run_agent(config, dry_run=not execute_payments, **agent_run_options(config, cycle=True))
+    if "incremental" in result:
+        job.set_stage("agent", dirty_skus=result["incremental"]["dirty_skus"])
 
     # 🔥 Update cache
     LAST_AGENT_RESULT = result
     LAST_AGENT_RUN_AT = datetime.utcnow()
 
-    if not execute_payments:
-        return result
+    decisions = result["decisions"]
+    job.set_stage("agent", decisions=len(decisions))
 
-    owner_df = pd.read_csv(OWNER_INVENTORY_CSV)
+    if not execute_payments:
+        publish_dashboard_snapshot(result, "preview")
+        return materialize(result)
 
     restocked_details = []
-    for d in result["decisions"]:
-        intent = d["payment_intent"]
-        amount_wei = int(intent["amount_wei"])
-        qty = d["restock_quantity"]
-        product = d["product"]
-        supplier_id = d["supplier_id"]
-
-        if amount_wei > USER_BALANCE_WEI:
-            continue
-
-        update = supplier_inventory_collection.update_one(
-            {
-                "product": product,
-                "supplier_id": supplier_id,
-                "available_stock": {"$gte": qty},
-            },
-            {"$inc": {"available_stock": -qty}, "$set": {"last_updated": datetime.utcnow()}},
-        )
+    restocked = {}
+    new_transactions = []
+    stamp = offer_stamp()
+
+    payable = []
+    for i in range(len(decisions)):
+        amount_wei = int(decisions.amount_wei(i))
+        if amount_wei <= USER_BALANCE_WEI:
+            payable.append((i, amount_wei))
+
+    # One bulk round trip reserves stock for every payable decision
+    job.set_stage("reserving", payable=len(payable))
+    reserved = reserve_stock(
+        [
+            (decisions.product[i], decisions.supplier_id[i], decisions.restock_quantity[i])
+            for i, _ in payable
+        ],
+        stamp,
+    )
 
-        if update.modified_count == 0:
-            continue
+    reserved_payments = [(i, amount_wei) for (i, amount_wei), ok in zip(payable, reserved) if ok]
 
-        tx = send_payment(
-            to_address=intent["supplier_address"],
-            amount_wei=amount_wei,
-            live=os.getenv("LIVE_PAYMENTS") == "true",
-        )
+    def record_payment(i, amount_wei, tx):
+        global TOTAL_SPENT_INR
 
-        TOTAL_SPENT_INR += d["total_cost"]
-        save_stats({"total_spent_inr": TOTAL_SPENT_INR})
+        with SPENT_LOCK:
+            TOTAL_SPENT_INR += decisions.total_cost[i]
+            queue_stats({"total_spent_inr": TOTAL_SPENT_INR})
 
         tx_doc = {
             "cycle_id": result["cycle_id"],
-            "product": product,
-            "supplier_id": supplier_id,
+            "product": decisions.product[i],
+            "supplier_id": decisions.supplier_id[i],
             "amount_wei": amount_wei,
             "tx_hash": tx["tx_hash"],
             "timestamp": datetime.utcnow().isoformat(),
         }
-        TRANSACTIONS.insert(0, tx_doc)
-        save_transaction(tx_doc)
+        TRANSACTIONS.appendleft(tx_doc)
+        queue_transaction(tx_doc)
+        return tx_doc
+
+    def record_late_payment(k, tx):
+        # A payment that outlived its deadline went through after all
+        i, amount_wei = reserved_payments[k]
+        print(f"⏰ Late payment confirmed for {decisions.product[i]}")
+        tx_doc = record_payment(i, amount_wei, tx)
+        INVENTORY.record({decisions.product[i]: decisions.restock_quantity[i]}, "restock", csv_path=OWNER_INVENTORY_CSV)
+        publish_dashboard_delta([tx_doc], result["cycle_id"])
+        persist_buffered_writes()
+
+    def release_late_failure(k, error):
+        # A timed-out payment failed after all: its reservation was kept, so give it back
+        i, _ = reserved_payments[k]
+        product, supplier_id = decisions.product[i], decisions.supplier_id[i]
+        qty = decisions.restock_quantity[i]
+        print(f"⏰ Late payment failed for {product}, releasing stock: {error}")
+        release_stamp = offer_stamp()
+        release_stock([(product, supplier_id, qty)], release_stamp)
+        SUPPLIER_OFFER_CACHE.restore(product, supplier_id, qty, release_stamp)
+
+    # Concurrent submission with per-call and cycle deadlines
+    job.set_stage("paying", reserved=len(reserved_payments))
+    report = PAYMENT_EXECUTOR.run(
+        [(decisions.supplier_address(i), amount_wei) for i, amount_wei in reserved_payments],
+        os.getenv("LIVE_PAYMENTS") == "true",
+        record_late_payment,
+        lambda index, status: job.progress(f"payments_{status}"),
+        release_late_failure,
+    )
+
+    job.set_stage("recording")
+    released = []
+    for (i, amount_wei), outcome in zip(reserved_payments, report["outcomes"]):
+        qty = decisions.restock_quantity[i]
+        product = decisions.product[i]
+        supplier_id = decisions.supplier_id[i]
+
+        if outcome["status"] in (FAILED, CANCELLED, SKIPPED):
+            # Certainly not paid: give the stock back
+            released.append((product, supplier_id, qty))
+            continue
+
+        # Paid, or timed out and possibly paid: the reservation stands.
+        # Keep the cached offers in step without a reload
+        SUPPLIER_OFFER_CACHE.decrement(product, supplier_id, qty, stamp)
+
+        if outcome["status"] != PAID:
+            continue
 
-        owner_df.loc[owner_df["product"] == product, "current_stock"] += qty
+        new_transactions.append(record_payment(i, amount_wei, outcome["tx"]))
+        restocked[product] = restocked.get(product, 0) + qty
         restocked_details.append(f"• {product}: {qty} units")
 
-    owner_df.to_csv(OWNER_INVENTORY_CSV, index=False)
+    release_stock(released, stamp)
 
-    INVENTORY_STATS = {
-        "healthy": int((owner_df["current_stock"] > 20).sum()),
-        "low": int(((owner_df["current_stock"] <= 20) & (owner_df["current_stock"] > 5)).sum()),
-        "critical": int((owner_df["current_stock"] <= 5).sum()),
-    }
+    # Paid stock reaches the ledger before anything that can fail on MongoDB.
+    # One ledger line per restocked SKU instead of rewriting the inventory
+    INVENTORY.record(restocked, "restock", csv_path=OWNER_INVENTORY_CSV)
+
+    # One upsert for stats and one insert_many for the cycle's transactions
+    persist_buffered_writes()
 
+    job.set_stage("notifying")
     msg_body = f"✅ StockEasy Restock Complete\nCycle: {result['cycle_id']}"
     if restocked_details:
         full_items_str = "\n".join(restocked_details)
@@ -330,20 +554,84 @@ async def run_restock(execute_payments: bool = False):
     send_whatsapp_message(msg_body, to_number=whatsapp_number)
 
     # 🔥 Ensure result reflects REAL accumulated spent after payments
+    # (a cooldown-skipped cycle carries no monthly_budget of its own)
+    monthly_budget = result.get("monthly_budget", config["monthly_budget"])
     result["total_spent"] = float(TOTAL_SPENT_INR)
-    result["budget_remaining"] = float(max(result["monthly_budget"] - TOTAL_SPENT_INR, 0))
+    result["budget_remaining"] = float(max(monthly_budget - TOTAL_SPENT_INR, 0))
+
+    # 🚀 Push the cycle's changes to the frontend
+    publish_dashboard_delta(new_transactions, result["cycle_id"])
+    publish_dashboard_snapshot(result, "cycle")
+
+    return {
+        "status": "success" if not report["counts"].get(TIMED_OUT) else "partial",
+        "cycle_id": result["cycle_id"],
+        "total_spent": TOTAL_SPENT_INR,
+        "payments": report["counts"],
+    }
+
+CYCLE_RUNNER = CycleRunner(RESTOCK_JOBS, execute_restock_cycle)
+
+@app.post("/run-restock")
+async def run_restock(execute_payments: bool = False):
+    # Same response as before, but the cycle runs on the job pool and the
+    # event loop only awaits it
+    job, _ = CYCLE_RUNNER.trigger("restock", execute_payments=execute_payments)
+    await asyncio.wrap_future(job.future)
+    if job.error:
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.result
+
+# =================================================
+# RESTOCK JOBS
+# =================================================
+@app.post("/api/restock/jobs", status_code=202)
+def submit_restock_job(execute_payments: bool = False):
+    job, trigger = CYCLE_RUNNER.trigger("restock", execute_payments=execute_payments)
+    return {**job.to_dict(include_result=False), "trigger": trigger}
+
+@app.get("/api/restock/jobs")
+def list_restock_jobs(limit: int = 20):
+    return {
+        "pending": RESTOCK_JOBS.pending(),
+        "jobs": [job.to_dict(include_result=False) for job in RESTOCK_JOBS.list(limit)],
+    }
 
-    # 🚀 Broadcast refresh to frontend
-    await manager.broadcast("refresh_dashboard")
+@app.get("/api/restock/metrics")
+def restock_metrics():
+    return CYCLE_RUNNER.metrics()
 
-    return {"status": "success", "cycle_id": result["cycle_id"], "total_spent": TOTAL_SPENT_INR}
+@app.get("/api/restock/jobs/{job_id}")
+def get_restock_job(job_id: str):
+    job = RESTOCK_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job.to_dict()
 
 # =================================================
 # TRANSACTIONS
 # =================================================
 @app.get("/transactions")
-def transactions():
-    return {"count": len(TRANSACTIONS), "transactions": TRANSACTIONS}
+def transactions(before: Optional[str] = None, limit: int = RECENT_TRANSACTIONS):
+    """
+    Newest first. Pass the returned `next_before` as `before` for the
+    next page; `next_before` is null on the last page.
+    """
+    limit = max(1, min(limit, MAX_TRANSACTIONS_PAGE))
+
+    recent = list(TRANSACTIONS)
+    if before is None and limit <= len(recent):
+        # First page from the in-memory window, in the same order as MongoDB
+        # pages so its cursor lines up with theirs
+        page = sorted(recent, key=transaction_sort_key, reverse=True)[:limit]
+    else:
+        page = load_transactions(limit=limit, before=before)
+
+    return {
+        "count": len(page),
+        "transactions": page,
+        "next_before": transaction_cursor(page[-1]) if len(page) == limit else None,
+    }
 
 # =================================================
 # SIMULATION
@@ -365,10 +653,11 @@ def simulate(tx: TransactionRequest):
 # =================================================
 # AUTO RUN
 # =================================================
-API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
-
 def auto_run():
-    try:
-        requests.post(f"{API_BASE_URL}/run-restock?execute_payments=true", timeout=30)
-    except Exception as e:
-        print("❌ Auto-run error:", e)
+    # In-process and single-flight: a tick during a running paying cycle is dropped
+    job, trigger = CYCLE_RUNNER.trigger("auto_restock", skip_if_busy=True, execute_payments=True)
+    print(f"⏱️ Auto-run {trigger}: restock job {job.id}")
+
+def on_scheduler_miss(event):
+    if event.job_id == "restock_job":
+        CYCLE_RUNNER.record_scheduler_miss()
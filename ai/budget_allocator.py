@@ -0,0 +1,156 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .supplier_offers import SupplierOfferIndex
+
+
+# ===============================
+# TIER QUEUE
+# ===============================
+class _TierQueue:
+    """
+    Candidates of one priority tier.
+
+    `order` pops candidates highest predicted demand first (ties in
+    catalog order). `cheapest` is a lazily-cleaned min-heap over each
+    candidate's lower-bound cost, so the tier knows the cheapest purchase
+    it could still make without scanning what is left.
+    """
+
+    def __init__(self, positions: np.ndarray, demand: np.ndarray, bounds: np.ndarray):
+        self.order = list(zip((-demand).tolist(), positions.tolist()))
+        self.cheapest = list(zip(bounds.tolist(), positions.tolist()))
+        heapq.heapify(self.order)
+        heapq.heapify(self.cheapest)
+        self.done = set()
+
+    def pop(self) -> int:
+        _, pos = heapq.heappop(self.order)
+        self.done.add(pos)
+        return pos
+
+    def min_bound(self) -> float:
+        while self.cheapest and self.cheapest[0][1] in self.done:
+            heapq.heappop(self.cheapest)
+        return self.cheapest[0][0] if self.cheapest else float("inf")
+
+    def __bool__(self) -> bool:
+        return bool(self.order)
+
+
+# ===============================
+# BUDGET ALLOCATOR
+# ===============================
+class BudgetAllocator:
+    """
+    Greedy budget allocation over RESTOCK candidates, driven by priority
+    queues instead of a full sort.
+
+    Tiers are drained highest priority first and, within a tier, highest
+    predicted demand first, which is the order the greedy loop has always
+    used. Every candidate carries a lower-bound cost (qty x its cheapest
+    offer). That lets the allocator drop a whole tier once its budget
+    cannot cover the cheapest purchase left in it. It stops outright when
+    the cycle budget, or every supplier cap, is below the cheapest purchase
+    left anywhere.
+    """
+
+    def __init__(
+        self,
+        cycle_budget: float,
+        priority_budgets: Dict[int, float],
+        supplier_caps: Dict[str, float],
+    ):
+        self.cycle_budget = cycle_budget
+        self.priority_budgets = priority_budgets
+        self.supplier_caps = supplier_caps
+
+        self.total_spent = 0
+        self.priority_spend = {p: 0 for p in sorted(priority_budgets)}
+        self.supplier_spend = {s: 0 for s in supplier_caps}
+        self.saturated_suppliers = set()
+
+    def allocate(
+        self,
+        restock_df: pd.DataFrame,
+        offer_index: SupplierOfferIndex,
+    ) -> Iterator[Tuple[int, str, float, float]]:
+        """
+        Yields (row position in restock_df, supplier_id, unit_cost, cost)
+        for every approved purchase, in approval order.
+        """
+        products = restock_df["product"].tolist()
+        qty = restock_df["restock_qty"].to_numpy(dtype=np.int64)
+        priority = restock_df["priority"].to_numpy(dtype=np.int64)
+        demand = restock_df["predicted_7d_demand"].to_numpy(dtype=np.int64)
+
+        unit_floor = (
+            restock_df["product"].map(offer_index.min_costs()).to_numpy(dtype=np.float64)
+        )
+        # SKUs nobody offers can never be bought. The half-paisa slack covers
+        # round(cost, 2) below landing just under qty x unit_floor.
+        bounds = np.where(np.isnan(unit_floor), np.inf, qty * unit_floor - 0.005)
+
+        tiers = {}
+        for p in sorted(self.priority_budgets, reverse=True):
+            positions = np.flatnonzero((priority == p) & np.isfinite(bounds))
+            if len(positions):
+                tiers[p] = _TierQueue(positions, demand[positions], bounds[positions])
+
+        reserved_stock = defaultdict(int)
+
+        for p, tier in tiers.items():
+            while tier:
+                floor = min(t.min_bound() for t in tiers.values() if t)
+                if self._exhausted(floor):
+                    return
+
+                if self.priority_budgets[p] - self.priority_spend[p] < tier.min_bound():
+                    break
+
+                pos = tier.pop()
+                product = products[pos]
+                need = int(qty[pos])
+
+                offer = offer_index.cheapest(product, need + reserved_stock[product])
+                if offer is None:
+                    continue
+
+                supplier_id, unit_cost = offer
+                if supplier_id in self.saturated_suppliers:
+                    continue
+
+                cost = round(need * unit_cost, 2)
+
+                if self.total_spent + cost > self.cycle_budget:
+                    continue
+
+                if self.priority_spend[p] + cost > self.priority_budgets[p]:
+                    continue
+
+                if supplier_id not in self.supplier_caps or (
+                    self.supplier_spend[supplier_id] + cost > self.supplier_caps[supplier_id]
+                ):
+                    continue
+
+                reserved_stock[product] += need
+                self.total_spent += cost
+                self.priority_spend[p] += cost
+                self.supplier_spend[supplier_id] += cost
+
+                yield pos, supplier_id, unit_cost, cost
+
+    def _exhausted(self, floor: float) -> bool:
+        """True once no budget bucket can absorb a purchase of `floor`."""
+        if self.cycle_budget - self.total_spent < floor:
+            return True
+
+        for s, cap in self.supplier_caps.items():
+            if cap - self.supplier_spend[s] < floor:
+                self.saturated_suppliers.add(s)
+
+        return len(self.saturated_suppliers) == len(self.supplier_caps)
@@ -0,0 +1,120 @@
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from .restock_jobs import RestockJob, RestockJobQueue
+
+# ===============================
+# TRIGGER OUTCOMES
+# ===============================
+QUEUED = "queued"          # a new cycle was queued
+COALESCED = "coalesced"    # folded into a cycle that has not started yet
+SKIPPED = "skipped"        # dropped: an identical cycle was already running
+
+
+class CycleRunner:
+    """
+    Single-flight front for restock cycles.
+
+    Every trigger (scheduler tick, API call) goes through `trigger()`.
+    At most one cycle runs at a time. Triggers that arrive while a cycle
+    with the same parameters is queued join that cycle instead of queueing
+    another, so a burst becomes one follow-up run. Scheduled triggers
+    pass `skip_if_busy=True` and are dropped while a cycle with the same
+    parameters runs, since that cycle already does their work; behind a
+    different cycle (e.g. a preview) they queue like any other trigger.
+    """
+
+    def __init__(self, jobs: RestockJobQueue, cycle: Callable[..., dict]):
+        self.jobs = jobs
+        self.cycle = cycle
+
+        self._lock = threading.Lock()      # guards the fields below
+        self._flight = threading.Lock()    # held for the length of a cycle
+        self._running: Optional[RestockJob] = None
+        self._running_key = None
+        self._pending = {}
+
+        self._metrics = {
+            "triggered": 0,
+            "queued": 0,
+            "coalesced": 0,
+            "skipped": 0,
+            "scheduler_missed": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "last_duration_s": None,
+            "last_finished_at": None,
+        }
+
+    # -------------------------------
+    # Triggers
+    # -------------------------------
+    def trigger(self, source: str, skip_if_busy: bool = False, **params) -> Tuple[RestockJob, str]:
+        """Returns the job that will cover this trigger and what happened to it."""
+        key = tuple(sorted(params.items()))
+
+        with self._lock:
+            self._metrics["triggered"] += 1
+
+            pending = self._pending.get(key)
+            if pending is not None:
+                self._metrics["coalesced"] += 1
+                return pending, COALESCED
+
+            if skip_if_busy and self._running is not None and self._running_key == key:
+                self._metrics["skipped"] += 1
+                return self._running, SKIPPED
+
+            job = self.jobs.submit(source, self._run, **params)
+            self._pending[key] = job
+            self._metrics["queued"] += 1
+            return job, QUEUED
+
+    def record_scheduler_miss(self):
+        """For scheduler ticks that never reached `trigger()` (missed or over max_instances)."""
+        with self._lock:
+            self._metrics["scheduler_missed"] += 1
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                **self._metrics,
+                "running_job": self._running.id if self._running else None,
+                "pending_jobs": [job.id for job in self._pending.values()],
+            }
+
+    # -------------------------------
+    # Worker side
+    # -------------------------------
+    def _run(self, job: RestockJob, **params) -> dict:
+        key = tuple(sorted(params.items()))
+        job.set_stage("waiting")
+
+        with self._flight:
+            with self._lock:
+                # From here on new triggers queue a follow-up instead of joining
+                if self._pending.get(key) is job:
+                    del self._pending[key]
+                self._running = job
+                self._running_key = key
+                self._metrics["started"] += 1
+
+            started = time.monotonic()
+            outcome = "failed"
+            try:
+                result = self.cycle(job, **params)
+                outcome = "completed"
+                return result
+            finally:
+                with self._lock:
+                    self._running = None
+                    self._running_key = None
+                    self._metrics[outcome] += 1
+                    self._metrics["last_duration_s"] = round(time.monotonic() - started, 3)
+                    self._metrics["last_finished_at"] = datetime.utcnow().isoformat()
@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from .agent_result import DecisionColumns
+
+from backend.db import config_collection
+
+# ===============================
+# SETTINGS
+# ===============================
+SNAPSHOT_ID = "DASHBOARD_SNAPSHOT"
+# Older than this, the background refresher rebuilds the snapshot
+SNAPSHOT_MAX_AGE_S = float(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE_S", 900))
+# How long a reader serves its in-memory copy before re-reading MongoDB
+SNAPSHOT_READ_TTL_S = float(os.getenv("DASHBOARD_SNAPSHOT_READ_TTL_S", 5))
+RECENT_DECISIONS = 5
+
+
+# ===============================
+# BUILD / PUBLISH
+# ===============================
+def build_snapshot(
+    result: dict,
+    stock_health: dict,
+    budget_used: float,
+    monthly_budget: float,
+    source: str,
+) -> dict:
+    """Dashboard payload from one agent result; only a few decisions are materialized."""
+    decisions = result.get("decisions") or []
+    if isinstance(decisions, DecisionColumns):
+        recent = [decisions.record(i) for i in range(min(len(decisions), RECENT_DECISIONS))]
+    else:
+        recent = list(decisions[:RECENT_DECISIONS])
+
+    return {
+        "cycleId": result.get("cycle_id"),
+        "source": source,
+        "stockHealth": {
+            **stock_health,
+            "total": sum(stock_health.values()),
+        },
+        "todayActivity": {
+            "actionsExecuted": len(decisions),
+            "totalSpent": result.get("total_spent", 0),
+            "actionsBlocked": 0,
+        },
+        "aiStatus": {
+            "isActive": True,
+            "monthlyBudget": monthly_budget,
+            "budgetUsed": budget_used,
+            "budgetRemaining": max(monthly_budget - budget_used, 0),
+        },
+        "recentDecisions": recent,
+    }
+
+
+def publish_snapshot(snapshot: dict):
+    config_collection.update_one(
+        {"_id": SNAPSHOT_ID},
+        {"$set": {"snapshot": snapshot, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def load_snapshot() -> Optional[dict]:
+    """{"snapshot", "updated_at"} or None if no cycle has published one yet."""
+    return config_collection.find_one({"_id": SNAPSHOT_ID}, {"_id": 0})
+
+
+def snapshot_age(doc: Optional[dict]) -> Optional[float]:
+    if not doc:
+        return None
+    return (datetime.utcnow() - doc["updated_at"]).total_seconds()
+
+
+# ===============================
+# READER
+# ===============================
+class DashboardSnapshotReader:
+    """
+    Serves the published snapshot from memory, re-reading the one MongoDB
+    document at most every `read_ttl` seconds. A GET never runs the agent.
+    """
+
+    def __init__(self, read_ttl: float = SNAPSHOT_READ_TTL_S):
+        self.read_ttl = read_ttl
+        self._lock = threading.Lock()
+        self._doc = None
+        self._read_at = None
+
+    def get(self) -> Optional[dict]:
+        with self._lock:
+            now = time.monotonic()
+            if self._read_at is None or now - self._read_at > self.read_ttl:
+                self._doc = load_snapshot()
+                self._read_at = now
+            return self._doc
+
+    def invalidate(self):
+        with self._lock:
+            self._read_at = None
+
+
+# ===============================
+# BACKGROUND REFRESHER
+# ===============================
+class SnapshotRefresher:
+    """
+    Keeps the snapshot within `max_age`: when the last publish (by a
+    restock cycle or by us) is older, `rebuild()` computes a fresh one off
+    the request path. One rebuild at a time.
+    """
+
+    def __init__(self, rebuild: Callable[[], dict], max_age: float = SNAPSHOT_MAX_AGE_S):
+        self.rebuild = rebuild
+        self.max_age = max_age
+        self._running = threading.Lock()
+        self.rebuilds = 0
+        self.failures = 0
+
+    def refresh_if_stale(self) -> bool:
+        """Returns True if it rebuilt the snapshot."""
+        if not self._running.acquire(blocking=False):
+            return False
+        try:
+            age = snapshot_age(load_snapshot())
+            if age is not None and age <= self.max_age:
+                return False
+
+            publish_snapshot(self.rebuild())
+            self.rebuilds += 1
+            return True
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Dashboard snapshot refresh failed: {e}")
+            return False
+        finally:
+            self._running.release()
+
+    def kick(self):
+        """Refresh in a daemon thread, unless one is already running."""
+        if not self._running.locked():
+            threading.Thread(target=self.refresh_if_stale, daemon=True).start()
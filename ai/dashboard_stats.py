@@ -1,11 +1,27 @@
 # ai/dashboard_stats.py
-# Dashboard stats service that uses restock_agent directly
+# Dashboard stats service: serves the snapshot restock cycles publish
+
+import sys
+from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from apscheduler.schedulers.background import BackgroundScheduler
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
 
-from restock_agent import run_agent
-from default_config import DEFAULT_CONFIG
+from ai.restock_agent import run_agent, OWNER_INVENTORY
+from ai.default_config import DEFAULT_CONFIG
+from ai.inventory_store import inventory_exists
+from ai.inventory_provider import INVENTORY
+from ai.stock_health import STOCK_HEALTH
+from ai.dashboard_snapshot import (
+    DashboardSnapshotReader, SnapshotRefresher, build_snapshot, snapshot_age,
+    SNAPSHOT_MAX_AGE_S,
+)
+from backend.config_store import load_stats
 
 app = FastAPI(title="StockEasy Dashboard Stats")
 
@@ -20,6 +36,51 @@ app.add_middleware(
 
 POL_TO_INR = 150000
 
+# How often the refresher checks the snapshot's age
+REFRESH_CHECK_S = 60
+
+
+def rebuild_snapshot() -> dict:
+    """Fallback when no cycle has published recently: a dry run (no cooldown side effects)."""
+    result = run_agent(DEFAULT_CONFIG, dry_run=True)
+
+    if inventory_exists(OWNER_INVENTORY):
+        INVENTORY.refresh(OWNER_INVENTORY)
+
+    return build_snapshot(
+        result,
+        stock_health=STOCK_HEALTH.counts(),
+        budget_used=load_stats().get("total_spent_inr", 0),
+        monthly_budget=DEFAULT_CONFIG["monthly_budget"],
+        source="refresher",
+    )
+
+
+reader = DashboardSnapshotReader()
+refresher = SnapshotRefresher(rebuild_snapshot)
+scheduler = BackgroundScheduler()
+
+
+@app.on_event("startup")
+def startup():
+    STOCK_HEALTH.configure(
+        DEFAULT_CONFIG["stock_health_low_at"],
+        DEFAULT_CONFIG["stock_health_critical_at"],
+    )
+    INVENTORY.subscribe(STOCK_HEALTH, OWNER_INVENTORY)
+
+    scheduler.add_job(
+        refresher.refresh_if_stale, "interval", seconds=REFRESH_CHECK_S,
+        id="dashboard_snapshot", max_instances=1, coalesce=True,
+    )
+    scheduler.start()
+    refresher.kick()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    scheduler.shutdown()
+
 
 @app.get("/")
 def health():
@@ -29,62 +90,31 @@ def health():
 @app.get("/api/dashboard/stats")
 def get_dashboard_stats():
     """
-    Aggregates data from restock_agent for the Home page dashboard.
-    Returns stock health, spending summary, and AI status.
+    Stock health, spending summary, AI status and recent decisions for the
+    Home page, read from the materialized snapshot.
     """
-    # Get restock data directly from agent
-    try:
-        restock_data = run_agent(DEFAULT_CONFIG)
-    except Exception as e:
-        print(f"Error running agent: {e}")
-        restock_data = {"decisions": [], "monthly_budget": 500000, "total_spent": 0, "budget_remaining": 500000}
-
-    # Compute stock health from restock decisions
-    decisions = restock_data.get("decisions", [])
-    healthy_count = 0
-    low_count = 0
-    critical_count = 0
-
-    for d in decisions:
-        current = d.get("current_stock", 0)
-        predicted = d.get("predicted_7d_demand", 0)
-        
-        if predicted == 0:
-            healthy_count += 1
-        elif current >= predicted:
-            healthy_count += 1
-        elif current >= predicted * 0.5:
-            low_count += 1
-        else:
-            critical_count += 1
-
-    # If no decisions, show default healthy inventory
-    if not decisions:
-        healthy_count = 20
-        low_count = 0
-        critical_count = 0
-
-    # Get budget from restock data
-    monthly_budget = restock_data.get("monthly_budget", 500000)
-
-    return {
-        "stockHealth": {
-            "healthy": healthy_count,
-            "low": low_count,
-            "critical": critical_count,
-            "total": healthy_count + low_count + critical_count
-        },
-        "todayActivity": {
-            "actionsExecuted": len(decisions),
-            "totalSpent": restock_data.get("total_spent", 0),
-            "actionsBlocked": 0
-        },
-        "aiStatus": {
-            "isActive": True,
-            "monthlyBudget": monthly_budget,
-            "budgetUsed": restock_data.get("total_spent", 0),
-            "budgetRemaining": restock_data.get("budget_remaining", monthly_budget)
-        },
-        "recentDecisions": decisions[:5] if decisions else []
-    }
+    doc = reader.get()
+    age = snapshot_age(doc)
+
+    if doc is None:
+        # Nothing published yet: the refresher is building the first one
+        refresher.kick()
+        return {
+            "stockHealth": {"healthy": 0, "low": 0, "critical": 0, "total": 0},
+            "todayActivity": {"actionsExecuted": 0, "totalSpent": 0, "actionsBlocked": 0},
+            "aiStatus": {
+                "isActive": True,
+                "monthlyBudget": DEFAULT_CONFIG["monthly_budget"],
+                "budgetUsed": 0,
+                "budgetRemaining": DEFAULT_CONFIG["monthly_budget"],
+            },
+            "recentDecisions": [],
+            "snapshotAge": None,
+            "stale": True,
+        }
+
+    stale = age > SNAPSHOT_MAX_AGE_S
+    if stale:
+        refresher.kick()
 
+    return {**doc["snapshot"], "snapshotAge": round(age, 1), "stale": stale}
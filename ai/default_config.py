@@ -3,6 +3,24 @@ DEFAULT_CONFIG = {
     "buffer_days": 7,
     "min_demand_threshold": 5,
 
+    # per-stage timings in the agent result (near-free when False)
+    "collect_timings": True,
+
+    # reuse supplier offers until supplier_inventory changes
+    "cache_supplier_offers": True,
+
+    # scheduled/paying cycles re-forecast only SKUs that changed since the last cycle
+    "incremental_cycles": True,
+
+    # >1: forecast in a process pool, sharded by "category" or "product"
+    # (takes precedence over incremental_cycles, which needs a single process)
+    "agent_workers": 1,
+    "shard_by": "category",
+
+    # stock-health buckets: critical at or below, low at or below, healthy above
+    "stock_health_low_at": 20,
+    "stock_health_critical_at": 5,
+
     "supplier_address_map": {
         "SUP1": "0x1111111111111111111111111111111111111111",
         "SUP2": "0x2222222222222222222222222222222222222222",
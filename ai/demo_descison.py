@@ -43,35 +43,34 @@ def reduce_for_demo(agent_output: dict, demo_config: dict) -> dict:
         return agent_output
 
     # Sort by priority first, then by cost (highest first)
-    decisions = sorted(
-        decisions,
-        key=lambda d: (d["priority"], d["total_cost"]),
+    order = sorted(
+        range(len(decisions)),
+        key=lambda i: (decisions.priority[i], decisions.total_cost[i]),
         reverse=True
     )
 
-    selected = []
+    picked = []
     used_suppliers = set()
 
-    for d in decisions:
-        supplier = d["supplier_id"]
+    for i in order:
+        supplier = decisions.supplier_id[i]
 
         # One payment per supplier (demo clarity)
         if supplier in used_suppliers:
             continue
 
-        # Recalculate amount_wei using demo conversion
-        d["payment_intent"]["amount_wei"] = inr_to_wei(
-            d["total_cost"],
-            demo_config
-        )
-
-        selected.append(d)
+        picked.append(i)
         used_suppliers.add(supplier)
 
-        if len(selected) == max_payments:
+        if len(picked) == max_payments:
             break
 
-    total_spent = round(sum(d["total_cost"] for d in selected), 2)
+    selected = decisions.take(picked)
+
+    # Recalculate amount_wei using demo conversion
+    selected.to_wei = lambda inr: inr_to_wei(inr, demo_config)
+
+    total_spent = round(sum(selected.total_cost), 2)
 
     agent_output.update({
         "decisions": selected,
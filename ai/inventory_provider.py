@@ -0,0 +1,182 @@
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .inventory_store import INVENTORY_CSV, inventory_stamp
+from .stock_ledger import COMPACT_AFTER_BYTES, StockLedger, apply_changes
+
+# Copy-on-write is always on from pandas 3. Before that it is a global
+# option this module leaves to the application (see _read_only).
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+
+def _read_only(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shallow copy whose shared arrays refuse in-place writes, for pandas
+    without copy-on-write. Adding or replacing whole columns still works
+    and stays in the copy; the cache itself only ever replaces columns.
+    """
+    view = frame.copy(deep=False)
+    for block in view._mgr.blocks:
+        if isinstance(block.values, np.ndarray):
+            block.values.flags.writeable = False
+    return view
+
+
+class _Entry:
+    __slots__ = ("ledger", "frame", "index", "stamp", "offset", "version", "listeners")
+
+    def __init__(self, csv_path: Path):
+        self.ledger = StockLedger(csv_path)
+        self.frame = None
+        self.index = None
+        self.stamp = None
+        self.offset = 0
+        self.version = 0
+        self.listeners = []
+
+
+class InventoryProvider:
+    """
+    Process-wide cache of the owner inventory: the on-disk snapshot with
+    the stock ledger applied.
+
+    `get()` revalidates with one stat of the snapshot (path, inode, mtime,
+    size) and of the ledger. A new snapshot means a full reload; ledger
+    growth only replays the appended lines through the product index.
+    Callers receive a shallow copy, O(columns) rather than O(rows). On
+    pandas 3, copy-on-write keeps it apart from the cache: writes copy
+    only what they touch. On older pandas its shared arrays are read-only,
+    so assigning whole columns works but an in-place `.loc`/`.iloc` write
+    raises instead of reaching the cache; copy first for that.
+
+    Stock changes go through `record()`, which appends to the ledger and
+    patches the cached frame; the snapshot is rewritten only by `compact()`.
+
+    Listeners registered with `subscribe()` see the same stream: `reset(frame)`
+    after every (re)load or compaction, and `apply(frame, index, products)`
+    with the products whose stock a replayed ledger batch changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _entry(self, csv_path) -> _Entry:
+        key = Path(csv_path).resolve()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(key)
+        return entry
+
+    def _reload(self, entry: _Entry):
+        entry.frame, entry.stamp, entry.offset = entry.ledger.load()
+        entry.index = pd.Index(entry.frame["product"])
+        self._notify_reset(entry)
+
+    @staticmethod
+    def _notify_reset(entry: _Entry):
+        for listener in entry.listeners:
+            listener.reset(entry.frame)
+
+    def _replay(self, entry: _Entry):
+        tail = entry.ledger.tail(entry.offset, entry.stamp)
+        if tail is None:
+            # Compacted by someone else meanwhile
+            self._reload(entry)
+            return
+
+        changes, entry.offset = tail
+        apply_changes(entry.frame, changes, entry.index)
+        if changes.stock_delta:
+            for listener in entry.listeners:
+                listener.apply(entry.frame, entry.index, changes.stock_delta)
+
+    def _catch_up(self, entry: _Entry, csv_path):
+        if entry.frame is None or inventory_stamp(csv_path) != entry.stamp:
+            self._reload(entry)
+        elif entry.ledger.size() != entry.offset:
+            self._replay(entry)
+
+    # -------------------------------
+    # READ
+    # -------------------------------
+    def get(self, csv_path: Path = INVENTORY_CSV) -> pd.DataFrame:
+        with self._lock:
+            entry = self._entry(csv_path)
+            self._catch_up(entry, csv_path)
+            if COPY_ON_WRITE:
+                return entry.frame.copy(deep=False)
+            return _read_only(entry.frame)
+
+    def refresh(self, csv_path: Path = INVENTORY_CSV):
+        """Catch up with the snapshot and ledger without copying the frame."""
+        with self._lock:
+            self._catch_up(self._entry(csv_path), csv_path)
+
+    def stamp(self, csv_path: Path = INVENTORY_CSV) -> tuple:
+        """Changes on any write to the snapshot or ledger, or on `invalidate()`."""
+        with self._lock:
+            entry = self._entry(csv_path)
+            return inventory_stamp(csv_path), entry.ledger.size(), entry.version
+
+    # -------------------------------
+    # WRITE
+    # -------------------------------
+    def record(
+        self,
+        stock_delta: Dict[str, int],
+        source: str,
+        daily_sales: Optional[Dict[str, int]] = None,
+        csv_path: Path = INVENTORY_CSV,
+    ):
+        """
+        Log stock deltas (and, for sales, new daily_sales values) for the
+        SKUs that changed. Cost is proportional to the number of SKUs.
+        """
+        if not stock_delta and not daily_sales:
+            return
+
+        with self._lock:
+            entry = self._entry(csv_path)
+            self._catch_up(entry, csv_path)
+
+            _, end = entry.ledger.append(stock_delta, source, daily_sales)
+            # Replays our batch, plus anything another process appended
+            # between the catch-up and our append
+            self._replay(entry)
+
+            if end > COMPACT_AFTER_BYTES:
+                self._compact(entry)
+
+    def compact(self, csv_path: Path = INVENTORY_CSV):
+        """Fold the ledger into the snapshot file."""
+        with self._lock:
+            self._compact(self._entry(csv_path))
+
+    def _compact(self, entry: _Entry):
+        entry.frame, entry.stamp = entry.ledger.compact()
+        entry.index = pd.Index(entry.frame["product"])
+        entry.offset = 0
+        entry.version += 1
+        self._notify_reset(entry)
+
+    def subscribe(self, listener, csv_path: Path = INVENTORY_CSV):
+        """Feed `listener` every change to this inventory (see class docstring)."""
+        with self._lock:
+            entry = self._entry(csv_path)
+            entry.listeners.append(listener)
+            if entry.frame is not None:
+                listener.reset(entry.frame)
+
+    def invalidate(self, csv_path: Path = INVENTORY_CSV):
+        with self._lock:
+            entry = self._entry(csv_path)
+            entry.frame = None
+            entry.version += 1
+
+
+INVENTORY = InventoryProvider()
@@ -0,0 +1,207 @@
+# ai/inventory_store.py
+#
+# python -m ai.inventory_store convert   # inventory.csv → inventory.arrow (one-time)
+# python -m ai.inventory_store export    # inventory.arrow → inventory.csv
+#
+# Owner inventory on disk. Once converted, the store is an Arrow IPC file
+# next to the CSV, read through a memory map with fixed dtypes instead of
+# being re-parsed. Without pyarrow (or before conversion) everything falls
+# back to the CSV, still with explicit dtypes.
+
+import os
+import sys
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # optional: CSV-only store
+    pa = None
+    ipc = None
+
+# ===============================
+# PATHS
+# ===============================
+DATA_DIR = Path(__file__).resolve().parent / "data" / "processed_dataset"
+INVENTORY_CSV = DATA_DIR / "inventory.csv"
+
+# ===============================
+# SCHEMA
+# ===============================
+OWNER_DTYPES = {
+    "product": str,
+    "category": str,
+    "sale_price": "float64",
+    "current_stock": "int64",
+    "avg_daily_sales": "int64",
+    "supplier_cost": "float64",
+    "supplier_id": str,
+    "daily_sales": "int64",
+}
+
+
+def arrow_path(csv_path: Path) -> Path:
+    return Path(csv_path).with_suffix(".arrow")
+
+
+def active_path(csv_path: Path = INVENTORY_CSV) -> Path:
+    """
+    File currently holding the inventory: the Arrow store when pyarrow is
+    available and it is at least as new as the CSV, otherwise the CSV.
+    """
+    csv_path = Path(csv_path)
+    arrow = arrow_path(csv_path)
+
+    if pa is None or not arrow.exists():
+        return csv_path
+    if csv_path.exists() and csv_path.stat().st_mtime_ns > arrow.stat().st_mtime_ns:
+        # CSV edited by hand after conversion: it wins until re-converted
+        return csv_path
+    return arrow
+
+
+def inventory_exists(csv_path: Path = INVENTORY_CSV) -> bool:
+    return active_path(csv_path).exists()
+
+
+def inventory_stamp(csv_path: Path = INVENTORY_CSV) -> tuple:
+    """(path, inode, mtime, size) of the active file, for change detection."""
+    path = active_path(csv_path)
+    stat = path.stat()
+    # Atomic saves replace the file, so the inode changes even when mtime
+    # and size do not
+    return str(path), stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+# ===============================
+# LOAD
+# ===============================
+def _load_arrow(path: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    with pa.memory_map(str(path), "r") as source:
+        table = ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+
+def _load_csv(path: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    return pd.read_csv(
+        path,
+        usecols=columns,
+        dtype={c: t for c, t in OWNER_DTYPES.items() if columns is None or c in columns},
+    )
+
+
+def load_inventory(
+    csv_path: Path = INVENTORY_CSV,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Owner inventory with OWNER_DTYPES. `columns` limits what is read;
+    with the Arrow store, unread columns are never touched.
+    """
+    path = active_path(csv_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Owner inventory missing: {path.name}")
+
+    if path.suffix == ".arrow":
+        return _load_arrow(path, columns)
+    return _load_csv(path, columns)
+
+
+# ===============================
+# SAVE
+# ===============================
+def _with_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({c: t for c, t in OWNER_DTYPES.items() if c in df.columns})
+
+
+def _atomic_write(path: Path, write, before_replace=None):
+    tmp = str(path.with_name(f".{path.name}.{os.getpid()}.tmp"))
+    try:
+        write(tmp)
+        if before_replace:
+            before_replace(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_arrow(df: pd.DataFrame, path: Path, before_replace=None):
+    table = pa.Table.from_pandas(_with_dtypes(df), preserve_index=False)
+
+    def write(tmp):
+        with pa.OSFile(tmp, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    _atomic_write(path, write, before_replace)
+
+
+def _write_csv(df: pd.DataFrame, path: Path, before_replace=None):
+    _atomic_write(path, lambda tmp: df.to_csv(tmp, index=False), before_replace)
+
+
+def save_inventory(df: pd.DataFrame, csv_path: Path = INVENTORY_CSV, before_replace=None):
+    """
+    Write the inventory back to whichever file is active, atomically.
+    `before_replace(tmp)` runs once the new file is complete, just before
+    it replaces the old one.
+    """
+    path = active_path(csv_path)
+    if path.suffix == ".arrow":
+        _write_arrow(df, path, before_replace)
+    else:
+        _write_csv(df, path, before_replace)
+
+
+# ===============================
+# CONVERSION
+# ===============================
+def convert_csv_to_arrow(csv_path: Path = INVENTORY_CSV) -> Path:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the Arrow inventory store")
+
+    csv_path = Path(csv_path)
+    arrow = arrow_path(csv_path)
+    _write_arrow(_load_csv(csv_path, None), arrow)
+    return arrow
+
+
+def export_arrow_to_csv(csv_path: Path = INVENTORY_CSV) -> Path:
+    csv_path = Path(csv_path)
+    arrow = arrow_path(csv_path)
+    if pa is None or not arrow.exists():
+        raise FileNotFoundError(f"No Arrow store to export: {arrow.name}")
+
+    _write_csv(_load_arrow(arrow, None), csv_path)
+    # Keep the Arrow store active: same content, now the newer file
+    os.utime(arrow)
+    return csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Owner inventory store")
+    parser.add_argument("command", choices=["convert", "export"])
+    parser.add_argument("--csv", type=Path, default=INVENTORY_CSV)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "convert":
+            out = convert_csv_to_arrow(args.csv)
+            print(f"✅ Converted {args.csv.name} → {out.name}")
+        else:
+            out = export_arrow_to_csv(args.csv)
+            print(f"✅ Exported {arrow_path(args.csv).name} → {out.name}")
+    except (RuntimeError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
@@ -6,6 +5,7 @@ from sklearn.linear_model import Ridge
 from pathlib import Path
 
 from ai.ml.features import build_features
+from ai.inventory_provider import INVENTORY
 
 
 # -------------------------------
@@ -16,7 +16,7 @@ DATA_PATH = BASE_DIR.parent / "data" / "processed_dataset" / "inventory.csv"
 
 
 def evaluate_model():
-    df = pd.read_csv(DATA_PATH)
+    df = INVENTORY.get(DATA_PATH)
 
     X, y, _ = build_features(df)
 
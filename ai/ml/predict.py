@@ -1,8 +1,22 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from typing import Optional
 
-def predict_7_day_demand(df: pd.DataFrame) -> np.ndarray:
+
+def seasonality_factor() -> float:
+    """Demand multiplier for today: weekend boost or none."""
+    today = datetime.utcnow().weekday()  # 0=Mon, 6=Sun
+
+    if today >= 5:  # Weekend boost
+        return 1.15
+    return 1.0
+
+
+def predict_7_day_demand(
+    df: pd.DataFrame,
+    price_reference: Optional[pd.DataFrame] = None,
+) -> np.ndarray:
     """
     Simulates real-world demand prediction with:
     - seasonality
@@ -10,6 +24,9 @@ def predict_7_day_demand(df: pd.DataFrame) -> np.ndarray:
     - stock pressure
     - momentum
     - controlled randomness
+
+    price_reference: frame the per-category mean price is taken from
+    (defaults to df). Pass the full catalog when predicting a subset.
     """
 
     df = df.copy()
@@ -22,17 +39,17 @@ def predict_7_day_demand(df: pd.DataFrame) -> np.ndarray:
     # -----------------------------
     # Seasonality (weekday / weekend)
     # -----------------------------
-    today = datetime.utcnow().weekday()  # 0=Mon, 6=Sun
-
-    if today >= 5:  # Weekend boost
-        seasonality = 1.15
-    else:
-        seasonality = 1.0
+    seasonality = seasonality_factor()
 
     # -----------------------------
     # Price elasticity
     # -----------------------------
-    category_price_mean = df.groupby("category")["sale_price"].transform("mean")
+    if price_reference is None:
+        category_price_mean = df.groupby("category")["sale_price"].transform("mean")
+    else:
+        category_price_mean = df["category"].map(
+            price_reference.groupby("category")["sale_price"].mean()
+        )
     price_ratio = df["sale_price"] / category_price_mean
 
     # Higher price → lower demand
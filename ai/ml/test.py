@@ -1,7 +1,7 @@
-import pandas as pd
 from ml.predict import predict_7_day_demand
+from inventory_store import load_inventory
 
-df = pd.read_csv("data/processed_dataset/inventory.csv")
+df = load_inventory("data/processed_dataset/inventory.csv")
 preds = predict_7_day_demand(df)
 
 print(preds[:5])
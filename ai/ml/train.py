@@ -1,9 +1,9 @@
-import pandas as pd
 from sklearn.linear_model import Ridge
 import joblib
 from pathlib import Path
 
 from ai.ml.features import build_features
+from ai.inventory_provider import INVENTORY
 
 
 # -------------------------------
@@ -18,7 +18,7 @@ MODEL_PATH = BASE_DIR / "models" / "demand_model.joblib"
 # -------------------------------
 # ORIGINAL LOGIC (UNCHANGED)
 # -------------------------------
-df = pd.read_csv(DATA_PATH)
+df = INVENTORY.get(DATA_PATH)
 
 X, y, _ = build_features(df)
 
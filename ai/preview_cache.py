@@ -0,0 +1,125 @@
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Hashable, Optional, Tuple
+
+# ===============================
+# SETTINGS
+# ===============================
+# Upper bound on staleness for changes no version key can see
+# (forecast model files, clock-driven cooldowns)
+PREVIEW_TTL_S = float(os.getenv("PREVIEW_TTL_S", 300))
+
+
+class PreviewEntry:
+    __slots__ = ("version", "body", "etag", "last_modified", "computed_at")
+
+    def __init__(self, version: Hashable, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        # HTTP dates have one-second resolution
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.computed_at = time.monotonic()
+
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            # Clients may keep the body but must revalidate every time
+            "Cache-Control": "no-cache",
+        }
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Conditional GET check; If-None-Match wins over If-Modified-Since."""
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or any(t.removeprefix("W/") == self.etag for t in tags)
+
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+
+        return False
+
+
+class PreviewCache:
+    """
+    Serialized /restock-items preview, valid for one version key.
+
+    The caller passes the current version (config, inventory and supplier
+    offer versions) with every `get()`. A matching entry younger than
+    `ttl` is served as is. Otherwise one caller recomputes while the
+    others asking for the same version wait on its result, so a burst of
+    polls on a cold cache costs one agent run.
+    """
+
+    def __init__(self, ttl: float = PREVIEW_TTL_S):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry: Optional[PreviewEntry] = None
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _fresh(self, version: Hashable) -> Optional[PreviewEntry]:
+        entry = self._entry
+        if entry is None or entry.version != version:
+            return None
+        if time.monotonic() - entry.computed_at > self.ttl:
+            return None
+        return entry
+
+    def get(self, version: Hashable, compute: Callable[[], bytes]) -> Tuple[PreviewEntry, bool]:
+        """Returns (entry, hit). `compute` returns the serialized body."""
+        with self._lock:
+            entry = self._fresh(version)
+            if entry is not None:
+                self.hits += 1
+                return entry, True
+
+            future = self._inflight.get(version)
+            leader = future is None
+            if leader:
+                future = self._inflight[version] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), False
+
+        try:
+            entry = PreviewEntry(version, compute())
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(version, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entry = entry
+            self._inflight.pop(version, None)
+        future.set_result(entry)
+        return entry, False
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+
+PREVIEW_CACHE = PreviewCache()
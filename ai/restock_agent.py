@@ -1,13 +1,20 @@
+import numpy as np
 import pandas as pd
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-import uuid
+from typing import Generator, Optional, Tuple
 from pathlib import Path
-from collections import defaultdict
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 
-from .ml.predict import predict_7_day_demand
+from .ml.predict import predict_7_day_demand, seasonality_factor
 from .default_config import DEFAULT_CONFIG
+from .supplier_offers import SupplierOfferIndex, SUPPLIER_OFFER_CACHE, fetch_cheapest_offers
+from .budget_allocator import BudgetAllocator
+from .agent_result import DecisionColumns, RESTOCK_REASON
+from .stage_timer import StageTimer
+from .inventory_store import inventory_exists
+from .inventory_provider import INVENTORY
 
 from backend.db import supplier_inventory_collection
 
@@ -59,9 +66,9 @@ def inr_to_wei(inr: float) -> str:
 
 
 def load_owner_inventory() -> pd.DataFrame:
-    if not OWNER_INVENTORY.exists():
+    if not inventory_exists(OWNER_INVENTORY):
         raise FileNotFoundError("Owner inventory.csv missing")
-    return pd.read_csv(OWNER_INVENTORY)
+    return INVENTORY.get(OWNER_INVENTORY)
 
 
 def is_critical(row: pd.Series) -> bool:
@@ -79,29 +86,379 @@ def restock_decision(row) -> dict:
         return {
             "decision": "RESTOCK",
             "qty": required - current,
-            "reason": "Predicted demand exceeds current stock",
+            "reason": RESTOCK_REASON,
         }
 
     return {"decision": "NO_RESTOCK"}
 
+
+def restock_requirements(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized `restock_decision` over a whole frame.
+    Returns only the RESTOCK rows, with their `restock_qty`.
+    """
+    predicted = df["predicted_7d_demand"].to_numpy(dtype=np.int64)
+    current = df["current_stock"].to_numpy(dtype=np.int64)
+
+    safety = (0.2 * predicted).astype(np.int64)
+    required = predicted + safety
+
+    restock = current < required
+    return df[restock].assign(restock_qty=(required - current)[restock])
+
+def fetch_supplier_offers(allowed_suppliers: list) -> pd.DataFrame:
+    """
+    In-stock offers from the allowed suppliers, grouped by product and
+    cheapest first. Filtering and ordering happen in MongoDB.
+    """
+    return fetch_cheapest_offers(supplier_inventory_collection, allowed_suppliers)
+
+
+
+def prioritize(owner_df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """
+    Filter to active SKUs and assign priority tiers. Rows stay in catalog
+    order; BudgetAllocator pops them by priority and demand.
+    """
+    owner_df = owner_df[
+        owner_df["predicted_7d_demand"] >= config["min_demand_threshold"]
+    ].head(config.get("max_active_skus", MAX_ACTIVE_SKUS))
+
+    owner_df["priority"] = pd.qcut(
+        owner_df["predicted_7d_demand"],
+        q=[0, 0.4, 0.7, 1],
+        labels=[1, 2, 3],
+    ).astype(int)
+
+    return owner_df
+
+# ===============================
+# SHARDED EXECUTION
+# ===============================
+_SHARD_POOL: Optional[ProcessPoolExecutor] = None
+_SHARD_POOL_WORKERS = 0
+
+SHARD_COLUMNS = [
+    "_pos", "product", "category", "current_stock",
+    "predicted_7d_demand", "restock_qty",
+]
+
+
+def _shard_pool(workers: int) -> ProcessPoolExecutor:
+    global _SHARD_POOL, _SHARD_POOL_WORKERS
+
+    if _SHARD_POOL is None or _SHARD_POOL_WORKERS != workers:
+        if _SHARD_POOL is not None:
+            _SHARD_POOL.shutdown(wait=False)
+        # Workers come from a forkserver (spawn where there is none, e.g.
+        # Windows): forking the threaded API process (scheduler, job and
+        # flush threads) can deadlock the child on a lock some other thread
+        # held. Reseed per worker all the same, so no two shards share
+        # forecast noise.
+        method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        _SHARD_POOL = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context(method),
+            initializer=np.random.seed,
+        )
+        _SHARD_POOL_WORKERS = workers
+
+    return _SHARD_POOL
+
+
+def shutdown_shard_pool():
+    """Stop the forecast workers; the next sharded run starts a new pool."""
+    global _SHARD_POOL, _SHARD_POOL_WORKERS
+
+    if _SHARD_POOL is not None:
+        _SHARD_POOL.shutdown(wait=True)
+        _SHARD_POOL, _SHARD_POOL_WORKERS = None, 0
+
+
+def _forecast_shard(
+    shard: pd.DataFrame,
+    min_demand_threshold: int,
+    price_reference: Optional[pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Worker side of a sharded cycle: forecast one shard and return the rows
+    that pass the demand threshold, with their restock quantity (0 for
+    NO_RESTOCK rows, which still count towards priority quantiles).
+    """
+    shard = shard.assign(
+        predicted_7d_demand=predict_7_day_demand(shard, price_reference=price_reference)
+    )
+    passing = shard[shard["predicted_7d_demand"] >= min_demand_threshold]
+
+    required = restock_requirements(passing)["restock_qty"]
+    passing = passing.assign(
+        restock_qty=required.reindex(passing.index, fill_value=0)
+    )
+    return passing[SHARD_COLUMNS]
+
+
+def partition_inventory(owner_df: pd.DataFrame, shards: int, shard_by: str = "category") -> list:
+    """
+    Split the catalog into at most `shards` frames.
+
+    shard_by="category" keeps each category whole (largest first, onto the
+    lightest shard), so per-category price means are exact inside a worker.
+    shard_by="product" hashes product names for an even split.
+    """
+    if shard_by == "product":
+        key = pd.util.hash_pandas_object(owner_df["product"], index=False) % shards
+        return [g for _, g in owner_df.groupby(key.to_numpy()) if len(g)]
+
+    sizes = owner_df["category"].value_counts()
+    loads = [0] * shards
+    assigned = {}
+    for category, size in sizes.items():
+        target = loads.index(min(loads))
+        assigned[category] = target
+        loads[target] += size
+
+    key = owner_df["category"].map(assigned).to_numpy()
+    return [g for _, g in owner_df.groupby(key) if len(g)]
+
+
+def sharded_candidates(
+    owner_df: pd.DataFrame,
+    config: dict,
+    workers: int,
+    shard_by: str = "category",
+):
+    """
+    Forecast and select candidates per shard in a process pool, then
+    reconcile globally: restore catalog order, apply the active-SKU cap,
+    cut priority quantiles over the whole active set and keep RESTOCK rows.
+
+    Returns (active_sku_count, restock_df) in the same shape the
+    sequential path feeds to BudgetAllocator, which enforces CYCLE_BUDGET,
+    PRIORITY_BUDGET_SPLIT and supplier_budget_split across all shards.
+    """
+    owner_df = owner_df.assign(_pos=np.arange(len(owner_df)))
+    shards = partition_inventory(owner_df, workers, shard_by)
+
+    price_reference = None
+    if shard_by != "category":
+        price_reference = owner_df.groupby("category", as_index=False)["sale_price"].mean()
+
+    pool = _shard_pool(workers)
+    parts = list(pool.map(
+        _forecast_shard,
+        shards,
+        [config["min_demand_threshold"]] * len(shards),
+        [price_reference] * len(shards),
+    ))
+
+    active_df = (
+        pd.concat(parts)
+        .sort_values("_pos", kind="mergesort")
+        .head(config.get("max_active_skus", MAX_ACTIVE_SKUS))
+    )
+
+    active_df["priority"] = pd.qcut(
+        active_df["predicted_7d_demand"],
+        q=[0, 0.4, 0.7, 1],
+        labels=[1, 2, 3],
+    ).astype(int)
+
+    restock_df = active_df[active_df["restock_qty"] > 0]
+    return len(active_df), restock_df.drop(columns="_pos")
+
+# ===============================
+# INCREMENTAL STATE
+# ===============================
+class IncrementalState:
+    """
+    Per-SKU state carried between incremental `run_agent` cycles.
+
+    A SKU is dirty when its current_stock, avg_daily_sales or supplier
+    offers changed since the previous cycle, or when a caller marked it
+    with `mark_dirty`. Every SKU is dirty when the seasonality factor
+    changed (weekday → weekend and back). Only dirty SKUs are re-forecast; everyone else keeps
+    last cycle's prediction. Priority tiers are quantiles over the whole
+    active set, so they are re-cut (one vectorized pass) whenever any
+    forecast moved. The budget loop always runs over the full RESTOCK set,
+    which keeps allocation globally consistent.
+    """
+
+    TRACKED_COLUMNS = ["current_stock", "avg_daily_sales"]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.inventory_stamp = None
+        self.seasonality = None
+        self.owner_df: Optional[pd.DataFrame] = None
+        self.offers: Optional[pd.DataFrame] = None
+        self.offer_index: Optional[SupplierOfferIndex] = None
+        self.active_count = 0
+        self.restock_df: Optional[pd.DataFrame] = None
+        self.decision_key = None
+        self.pending = set()
+        self.dirty_count = 0
+        self.offers_changed = 0
+
+    def mark_dirty(self, products):
+        self.pending.update(products)
+
+    # -------------------------------
+    # OWNER INVENTORY + FORECAST
+    # -------------------------------
+    def refresh_inventory(self) -> pd.DataFrame:
+        stamp = INVENTORY.stamp(OWNER_INVENTORY)
+        seasonality = seasonality_factor()
+
+        if stamp == self.inventory_stamp and seasonality == self.seasonality and not self.pending:
+            self.dirty_count = 0
+            return self.owner_df
+
+        owner_df = load_owner_inventory()
+        dirty = np.ones(len(owner_df), dtype=bool)
+        predicted = np.zeros(len(owner_df), dtype=np.int64)
+
+        if self.owner_df is not None and seasonality == self.seasonality:
+            prev = (
+                self.owner_df.drop_duplicates("product", keep="last")
+                .set_index("product")
+                .reindex(owner_df["product"])
+            )
+            known = prev["predicted_7d_demand"].notna().to_numpy()
+
+            dirty = ~known
+            for col in self.TRACKED_COLUMNS:
+                dirty |= prev[col].to_numpy() != owner_df[col].to_numpy()
+
+            # Price or category moves shift a category's mean price,
+            # which feeds every forecast in that category
+            regrouped = (
+                (prev["sale_price"].to_numpy() != owner_df["sale_price"].to_numpy())
+                | (prev["category"].to_numpy() != owner_df["category"].to_numpy())
+            ) & known
+            if regrouped.any():
+                categories = set(owner_df["category"].to_numpy()[regrouped])
+                categories |= set(prev["category"].to_numpy()[regrouped])
+                dirty |= owner_df["category"].isin(categories).to_numpy()
+
+            dirty |= owner_df["product"].isin(self.pending).to_numpy()
+            predicted[known] = prev["predicted_7d_demand"].to_numpy()[known]
+
+        if dirty.any():
+            predicted[dirty] = predict_7_day_demand(
+                owner_df[dirty], price_reference=owner_df
+            )
+
+        owner_df["predicted_7d_demand"] = predicted
+
+        self.inventory_stamp = stamp
+        self.seasonality = seasonality
+        self.owner_df = owner_df
+        self.pending.clear()
+        self.dirty_count = int(dirty.sum())
+        if self.dirty_count:
+            self.decision_key = None
+
+        return owner_df
+
+    # -------------------------------
+    # SUPPLIER OFFERS
+    # -------------------------------
+    def refresh_offers(self, supplier_df: pd.DataFrame) -> SupplierOfferIndex:
+        if supplier_df.empty:
+            offers = pd.DataFrame(columns=["supplier_cost", "available_stock"])
+        else:
+            offers = supplier_df.set_index(["product", "supplier_id"])[
+                ["supplier_cost", "available_stock"]
+            ]
+
+        if self.offers is not None:
+            joined = offers.join(self.offers, how="outer", rsuffix="_prev")
+            changed = (
+                (joined["supplier_cost"] != joined["supplier_cost_prev"])
+                | (joined["available_stock"] != joined["available_stock_prev"])
+            )
+            self.offers_changed = joined.index[changed].get_level_values(0).nunique()
+            if not self.offers_changed:
+                return self.offer_index
+        else:
+            self.offers_changed = len(offers)
+
+        self.offers = offers
+        self.offer_index = SupplierOfferIndex.from_frame(supplier_df, presorted=True)
+        return self.offer_index
+
+    # -------------------------------
+    # DECISION STATE
+    # -------------------------------
+    def refresh_decisions(self, owner_df: pd.DataFrame, config: dict) -> pd.DataFrame:
+        key = (
+            config["min_demand_threshold"],
+            config.get("max_active_skus", MAX_ACTIVE_SKUS),
+        )
+        if key != self.decision_key:
+            active_df = prioritize(owner_df, config)
+            self.active_count = len(active_df)
+            self.restock_df = restock_requirements(active_df)
+            self.decision_key = key
+
+        return self.restock_df
+
+
+INCREMENTAL_STATE = IncrementalState()
+
 # ===============================
 # MAIN AGENT
 # ===============================
-def run_agent(config: Optional[dict] = None) -> dict:
+def _agent_cycle(
+    config: Optional[dict],
+    incremental: bool,
+    workers: int,
+    shard_by: str,
+    dry_run: bool = False,
+) -> Generator[Tuple[DecisionColumns, int], None, dict]:
+    """
+    The restock cycle. Appends each approved decision to the cycle's
+    DecisionColumns and yields (columns, position); returns the result.
+    """
     global LAST_RESTOCK_AT
 
+    if incremental and workers > 1:
+        raise ValueError("Incremental and sharded modes cannot be combined")
+
     config = {**DEFAULT_CONFIG, **(config or {})}
     now = datetime.now(timezone.utc)
     cycle_id = now.isoformat()
+    state = INCREMENTAL_STATE if incremental else None
+    timer = StageTimer(enabled=config.get("collect_timings", True))
 
     logger.info(f"Starting restock cycle {cycle_id}")
     logger.info(f"Monthly budget: ₹{config['monthly_budget']}")
 
+    decisions = DecisionColumns(
+        cycle_id=cycle_id,
+        valid_until=int((now + timedelta(minutes=15)).timestamp()),
+        supplier_address_map=config["supplier_address_map"],
+        to_wei=inr_to_wei,
+    )
+
     # -------------------------------
     # LOAD OWNER INVENTORY
     # -------------------------------
-    owner_df = load_owner_inventory()
-    owner_df["predicted_7d_demand"] = predict_7_day_demand(owner_df)
+    if state:
+        with timer.stage("inventory_refresh") as stage:
+            owner_df = state.refresh_inventory()
+            stage.rows = state.dirty_count
+    else:
+        with timer.stage("load_inventory") as stage:
+            owner_df = load_owner_inventory()
+            stage.rows = len(owner_df)
+
+        # Sharded cycles forecast per shard below
+        if workers <= 1:
+            with timer.stage("forecast", rows=len(owner_df)):
+                owner_df["predicted_7d_demand"] = predict_7_day_demand(owner_df)
 
     # -------------------------------
     # COOLDOWN CHECK
@@ -115,7 +472,8 @@ def run_agent(config: Optional[dict] = None) -> dict:
                 "cycle_id": cycle_id,
                 "status": "SKIPPED",
                 "reason": "Cooldown active",
-                "decisions": [],
+                "decisions": decisions,
+                **({"timings": timer.as_dict()} if timer.enabled else {}),
             }
 
     # -------------------------------
@@ -129,8 +487,14 @@ def run_agent(config: Optional[dict] = None) -> dict:
         for p, r in PRIORITY_BUDGET_SPLIT.items()
     }
 
-    priority_spend = {1: 0, 2: 0, 3: 0}
-    supplier_spend = {s: 0 for s in config["supplier_budget_split"]}
+    allocator = BudgetAllocator(
+        cycle_budget=CYCLE_BUDGET,
+        priority_budgets=PRIORITY_BUDGETS,
+        supplier_caps={
+            s: MONTHLY_BUDGET * split
+            for s, split in config["supplier_budget_split"].items()
+        },
+    )
 
     logger.info(f"Cycle budget: ₹{CYCLE_BUDGET}")
 
@@ -138,127 +502,152 @@ def run_agent(config: Optional[dict] = None) -> dict:
     # LOAD SUPPLIER INVENTORY ONCE
     # -------------------------------
     allowed_suppliers = list(config["supplier_address_map"].keys())
-
-    supplier_df = pd.DataFrame(
-        supplier_inventory_collection.find(
-            {"supplier_id": {"$in": allowed_suppliers}},
-            {
-                "_id": 0,
-                "product": 1,
-                "supplier_id": 1,
-                "supplier_cost": 1,
-                "available_stock": 1,
-            }
-        )
-    )
-
-    supplier_df = supplier_df.sort_values("supplier_cost")
+    cached = None
+    with timer.stage("supplier_fetch") as stage:
+        if config.get("cache_supplier_offers", True):
+            cached, cache_hit = SUPPLIER_OFFER_CACHE.get(
+                supplier_inventory_collection, allowed_suppliers, fetch_supplier_offers
+            )
+            supplier_df = cached.frame
+        else:
+            supplier_df = fetch_supplier_offers(allowed_suppliers)
+        stage.rows = len(supplier_df)
+
+    # product → cost-sorted offers, one bisect per SKU below
+    with timer.stage("offer_index", rows=len(supplier_df)):
+        if state:
+            offer_index = state.refresh_offers(supplier_df)
+        elif cached:
+            offer_index = cached.index()
+        else:
+            offer_index = SupplierOfferIndex.from_frame(supplier_df, presorted=True)
 
     # -------------------------------
     # FILTER & PRIORITIZE SKUs
     # -------------------------------
-    owner_df = owner_df[
-        owner_df["predicted_7d_demand"] >= config["min_demand_threshold"]
-    ].head(MAX_ACTIVE_SKUS)
-
-    owner_df["priority"] = pd.qcut(
-        owner_df["predicted_7d_demand"],
-        q=[0, 0.4, 0.7, 1],
-        labels=[1, 2, 3],
-    ).astype(int)
-
-    owner_df = owner_df.sort_values(
-        ["priority", "predicted_7d_demand"],
-        ascending=False
+    if state:
+        with timer.stage("decision_stage", rows=len(owner_df)):
+            restock_df = state.refresh_decisions(owner_df, config)
+            active_skus = state.active_count
+    elif workers > 1:
+        with timer.stage("sharded_candidates", rows=len(owner_df)):
+            active_skus, restock_df = sharded_candidates(owner_df, config, workers, shard_by)
+    else:
+        with timer.stage("prioritize", rows=len(owner_df)):
+            owner_df = prioritize(owner_df, config)
+            active_skus = len(owner_df)
+
+        # Only RESTOCK rows ever reach Python-level iteration
+        with timer.stage("decision_stage", rows=active_skus):
+            restock_df = restock_requirements(owner_df)
+
+    products = restock_df["product"].tolist()
+    categories = (
+        restock_df["category"].tolist()
+        if "category" in restock_df else [None] * len(restock_df)
     )
-
-    decisions = []
-    total_spent = 0
-    reserved_stock = defaultdict(int)
+    priorities = restock_df["priority"].tolist()
+    demand = restock_df["predicted_7d_demand"].tolist()
+    current_stock = restock_df["current_stock"].tolist()
+    quantities = restock_df["restock_qty"].tolist()
 
     # ===============================
     # CORE DECISION LOOP (FAST)
     # ===============================
-    for row in owner_df.itertuples(index=False):
-        decision = restock_decision(row)
-        if decision["decision"] != "RESTOCK":
-            continue
-
-        product = row.product
-        qty = int(decision["qty"])
-        priority = int(row.priority)
-
-        candidates = supplier_df[
-            (supplier_df["product"] == product) &
-            (supplier_df["available_stock"] >= qty + reserved_stock[(product, "$ANY")])
-        ]
-
-        if candidates.empty:
-            continue
-
-        supplier_row = candidates.iloc[0]
-        supplier_id = supplier_row.supplier_id
-        unit_cost = float(supplier_row.supplier_cost)
-        cost = round(qty * unit_cost, 2)
-
-        if total_spent + cost > CYCLE_BUDGET:
-            continue
-
-        if priority_spend[priority] + cost > PRIORITY_BUDGETS[priority]:
-            continue
-
-        if supplier_spend[supplier_id] + cost > (
-            MONTHLY_BUDGET * config["supplier_budget_split"][supplier_id]
-        ):
-            continue
-
-        # APPROVED LOG REMOVED FOR SPEED
-        # logger.info(f"APPROVED {product} → {supplier_id} ₹{unit_cost} x {qty}")
-
-        reserved_stock[(product, "$ANY")] += qty
-        total_spent += cost
-        priority_spend[priority] += cost
-        supplier_spend[supplier_id] += cost
-
-        decisions.append({
-            "product": product,
-            "category": getattr(row, "category", None),
-            "supplier_id": supplier_id,
-            "priority": priority,
-            "predicted_7d_demand": int(row.predicted_7d_demand),
-            "current_stock": int(row.current_stock),
-            "restock_quantity": qty,
-            "supplier_cost_per_unit": unit_cost,
-            "total_cost": cost,
-            "reason": decision["reason"],
-            "payment_intent": {
-                "intent_id": f"restock-{cycle_id}-{uuid.uuid4().hex[:6]}",
-                "supplier_address": config["supplier_address_map"][supplier_id],
-                "amount_wei": inr_to_wei(cost),
-                "token": "NATIVE",
-                "valid_until": int((now + timedelta(minutes=15)).timestamp()),
-                "reason": "AUTO_RESTOCK",
-            },
-        })
-
-    if decisions:
-        LAST_RESTOCK_AT = now
-
+    # A streaming consumer's time between yields lands in this stage too
+    with timer.stage("allocation", rows=len(restock_df)):
+        for pos, supplier_id, unit_cost, cost in allocator.allocate(restock_df, offer_index):
+            if not decisions and not dry_run:
+                LAST_RESTOCK_AT = now
+
+            i = decisions.append(
+                products[pos],
+                categories[pos],
+                supplier_id,
+                int(priorities[pos]),
+                int(demand[pos]),
+                int(current_stock[pos]),
+                int(quantities[pos]),
+                unit_cost,
+                cost,
+            )
+            yield decisions, i
+
+    total_spent = allocator.total_spent
     logger.info(f"Cycle complete | Total spent ₹{total_spent}")
 
-    return {
+    summary = {
         "cycle_id": cycle_id,
         "status": "EXECUTED",
         "monthly_budget": MONTHLY_BUDGET,
         "cycle_budget": CYCLE_BUDGET,
         "total_spent": total_spent,
         "budget_remaining": MONTHLY_BUDGET - total_spent,
-        "priority_spend": priority_spend,
-        "supplier_spend": supplier_spend,
-        "active_skus_processed": len(owner_df),
+        "priority_spend": allocator.priority_spend,
+        "supplier_spend": allocator.supplier_spend,
+        "active_skus_processed": active_skus,
+        "supplier_cache": ("hit" if cache_hit else "miss") if cached else "off",
         "decisions": decisions,
     }
 
+    if state:
+        summary["incremental"] = {
+            "dirty_skus": state.dirty_count,
+            "offers_changed": state.offers_changed,
+        }
+
+    if timer.enabled:
+        summary["timings"] = timer.as_dict()
+
+    return summary
+
+
+def iter_agent(
+    config: Optional[dict] = None,
+    incremental: bool = False,
+    workers: int = 1,
+    shard_by: str = "category",
+    dry_run: bool = False,
+) -> Generator[dict, None, dict]:
+    """
+    Streaming form of `run_agent`: yields each decision (as a dict) as
+    soon as it is approved and returns the cycle summary (everything but
+    "decisions") as the generator's return value.
+    """
+    cycle = _agent_cycle(config, incremental, workers, shard_by, dry_run)
+    while True:
+        try:
+            columns, pos = next(cycle)
+        except StopIteration as done:
+            summary = done.value
+            summary.pop("decisions")
+            return summary
+        yield columns.record(pos)
+
+
+def run_agent(
+    config: Optional[dict] = None,
+    incremental: bool = False,
+    workers: int = 1,
+    shard_by: str = "category",
+    dry_run: bool = False,
+) -> dict:
+    """
+    Run one restock cycle. `decisions` in the result is a DecisionColumns;
+    use `agent_result.materialize` to get the JSON shape.
+
+    incremental: reuse INCREMENTAL_STATE and re-evaluate only changed SKUs.
+    workers > 1: forecast and select candidates in a process pool, sharded
+    by `shard_by` ("category" or "product"), then allocate globally.
+    dry_run: plan only; leave LAST_RESTOCK_AT (the cooldown clock) alone.
+    """
+    cycle = _agent_cycle(config, incremental, workers, shard_by, dry_run)
+    while True:
+        try:
+            next(cycle)
+        except StopIteration as done:
+            return done.value
+
 # ===============================
 # LOCAL TEST
 # ===============================
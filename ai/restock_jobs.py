@@ -0,0 +1,161 @@
+import os
+import uuid
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Optional
+
+# ===============================
+# SETTINGS
+# ===============================
+# Cycles spend from one budget and reserve from one supplier pool: run them
+# one at a time unless the deployment knows better
+RESTOCK_JOB_WORKERS = int(os.getenv("RESTOCK_JOB_WORKERS", 1))
+RESTOCK_JOB_HISTORY = int(os.getenv("RESTOCK_JOB_HISTORY", 100))
+
+# ===============================
+# STATUSES
+# ===============================
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class RestockJob:
+    """
+    One submitted restock cycle.
+
+    The worker reports where it is with `set_stage()` and bumps counters
+    with `progress()`; pollers read a consistent copy through `to_dict()`.
+    """
+
+    def __init__(self, kind: str, params: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.stage = None
+        self.counters = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # Worker side
+    # -------------------------------
+    def set_stage(self, stage: str, **counters):
+        with self._lock:
+            self.stage = stage
+            self.counters.update(counters)
+
+    def progress(self, counter: str, n: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    # -------------------------------
+    # Poller side
+    # -------------------------------
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        with self._lock:
+            doc = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": dict(self.counters),
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            }
+            if include_result:
+                doc["result"] = self.result
+            return doc
+
+
+class RestockJobQueue:
+    """
+    Runs restock cycles on a small worker pool, off the event loop.
+
+    `submit(kind, fn, **params)` returns a RestockJob right away; the pool
+    later calls `fn(job, **params)` and stores its return value (or the
+    error) on the job. The most recent RESTOCK_JOB_HISTORY jobs stay
+    queryable by id; older finished ones are dropped.
+    """
+
+    def __init__(self, workers: int = RESTOCK_JOB_WORKERS, history: int = RESTOCK_JOB_HISTORY):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="restock-job")
+        self.history = history
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+
+    def submit(self, kind: str, fn: Callable[..., dict], **params) -> RestockJob:
+        job = RestockJob(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        job.future = self.pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[RestockJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, limit: int = 20) -> List[RestockJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))[:limit]
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(not job.done for job in self._jobs.values())
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+
+    # -------------------------------
+    # Internals
+    # -------------------------------
+    def _run(self, job: RestockJob, fn: Callable[..., dict]) -> Optional[dict]:
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            result = fn(job, **job.params)
+        except Exception as e:
+            print(f"❌ Restock job {job.id} failed: {e}")
+            traceback.print_exc()
+            job.error = repr(e)
+            job.status = FAILED
+            job.set_stage("failed")
+            return None
+        finally:
+            job.finished_at = datetime.utcnow()
+
+        job.result = result
+        job.status = SUCCEEDED
+        job.set_stage("done")
+        return result
+
+    def _evict(self):
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        # Oldest finished jobs go first; queued and running ones are kept
+        for job_id in [j.id for j in self._jobs.values() if j.done][:excess]:
+            del self._jobs[job_id]
+
+
+RESTOCK_JOBS = RestockJobQueue()
@@ -0,0 +1,383 @@
+# ai/scripts/benchmark_agent.py
+#
+# python ai/scripts/benchmark_agent.py                      # 10k,100k,1M,5M x 3,20 suppliers
+# python ai/scripts/benchmark_agent.py --sizes 10000 100000 --suppliers 3
+# python ai/scripts/benchmark_agent.py --inventory-format csv  # parse inventory.csv instead
+# python ai/scripts/benchmark_agent.py --incremental        # plus a warm cycle after 1% of SKUs change
+# python ai/scripts/benchmark_agent.py --workers 4 --shard-by product  # sharded process-pool forecast
+# python ai/scripts/benchmark_agent.py --compare old.json new.json
+#
+# Each case runs in its own process, so peak RSS covers generating the
+# synthetic catalog plus one agent cycle over it.
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import multiprocessing as mp
+from datetime import datetime
+from pathlib import Path
+from queue import Empty
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# FIX PYTHON PATH (PROJECT ROOT)
+# -------------------------------------------------
+BASE_DIR = Path(__file__).resolve().parents[2]  # Stock_Easy/
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+# backend.db needs a URI at import time. It is never contacted: the
+# supplier collection is swapped for InMemorySupplierCollection below.
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+DEFAULT_SUPPLIERS = [3, 20]
+OFFERS_PER_SKU = 3
+CATEGORIES = 11
+BUDGET_PER_SKU = 100  # ₹ of monthly budget per SKU, so budgets scale with the catalog
+WARM_CHANGE_RATIO = 0.01  # share of SKUs whose stock moves before the warm incremental cycle
+
+RESULTS_DIR = Path("benchmark_results")
+
+
+# ===============================
+# IN-MEMORY SUPPLIER COLLECTION
+# ===============================
+class InMemorySupplierCollection:
+    """
+    Stand-in for `supplier_inventory_collection` backed by a DataFrame.
+    Supports the `{"supplier_id": {"$in": [...]}}` filter and field
+    projection, evaluates `cheapest_offer_pipeline` for `aggregate` and
+    answers the offer cache's version probes, returning documents as dicts
+    like pymongo.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def find(self, query=None, projection=None):
+        df = self.df
+        wanted = (query or {}).get("supplier_id", {}).get("$in")
+        if wanted is not None:
+            df = df[df["supplier_id"].isin(wanted)]
+
+        if projection:
+            cols = [c for c, on in projection.items() if on and c in df.columns]
+            df = df[cols]
+
+        return df.to_dict(orient="records")
+
+    def estimated_document_count(self):
+        return len(self.df)
+
+    def find_one(self, query=None, projection=None, sort=None):
+        # Synthetic offers carry no last_updated, the only field queried
+        return None
+
+    def aggregate(self, pipeline, **kwargs):
+        match = pipeline[0]["$match"]
+        df = self.df[
+            self.df["supplier_id"].isin(match["supplier_id"]["$in"])
+            & (self.df["available_stock"] > match["available_stock"]["$gt"])
+        ].sort_values(["product", "supplier_cost", "supplier_id"], kind="mergesort")
+
+        offers = df[["supplier_id", "supplier_cost", "available_stock"]].to_dict(orient="records")
+        products = df["product"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]]) if len(df) else []
+        ends = np.r_[starts[1:], len(df)] if len(df) else []
+
+        for start, end in zip(starts, ends):
+            yield {"_id": products[start], "offers": offers[start:end]}
+
+
+# ===============================
+# SYNTHETIC CATALOG
+# ===============================
+def generate_catalog(skus: int, suppliers: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    supplier_ids = np.array([f"SUP{i + 1}" for i in range(suppliers)])
+
+    avg_daily_sales = rng.integers(1, 25, skus)
+    sale_price = rng.uniform(20, 500, skus).round(2)
+    current_stock = (avg_daily_sales * rng.uniform(0, 14, skus)).astype(np.int64)
+
+    owner_df = pd.DataFrame({
+        "product": "SKU-" + pd.Series(np.arange(skus)).astype(str),
+        "category": "CAT-" + pd.Series(rng.integers(0, CATEGORIES, skus)).astype(str),
+        "sale_price": sale_price,
+        "current_stock": current_stock,
+        "avg_daily_sales": avg_daily_sales,
+        "supplier_cost": (sale_price * 0.8).round(2),
+        "supplier_id": rng.choice(supplier_ids, skus),
+        "daily_sales": np.zeros(skus, dtype=np.int64),
+    })
+
+    # Each SKU is carried by OFFERS_PER_SKU distinct suppliers
+    per_sku = min(OFFERS_PER_SKU, suppliers)
+    picks = np.argsort(rng.random((skus, suppliers)), axis=1)[:, :per_sku]
+
+    supplier_df = pd.DataFrame({
+        "product": np.repeat(owner_df["product"].to_numpy(), per_sku),
+        "supplier_id": supplier_ids[picks.ravel()],
+        "supplier_cost": (
+            np.repeat(owner_df["supplier_cost"].to_numpy(), per_sku)
+            * rng.uniform(0.9, 1.1, skus * per_sku)
+        ).round(2),
+        "available_stock": rng.integers(0, 1_000, skus * per_sku),
+    })
+
+    return owner_df, supplier_df
+
+
+def agent_config(skus: int, suppliers: int) -> dict:
+    ids = [f"SUP{i + 1}" for i in range(suppliers)]
+    return {
+        "monthly_budget": skus * BUDGET_PER_SKU,
+        "min_demand_threshold": 5,
+        "max_active_skus": skus,
+        "supplier_address_map": {s: "0x" + f"{i + 1:040x}" for i, s in enumerate(ids)},
+        "supplier_budget_split": {s: 1 / suppliers for s in ids},
+    }
+
+
+# ===============================
+# MEMORY
+# ===============================
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ===============================
+# ONE BENCHMARK CASE
+# ===============================
+def warm_cycle(agent, inventory: Path, config: dict, seed: int) -> dict:
+    """Second incremental cycle after a small share of SKUs sold some stock."""
+    from ai.inventory_provider import INVENTORY
+
+    frame = agent.load_owner_inventory()
+    rng = np.random.default_rng(seed + 1)
+    changed = rng.choice(len(frame), max(1, int(len(frame) * WARM_CHANGE_RATIO)), replace=False)
+    INVENTORY.record(
+        {p: -1 for p in frame["product"].to_numpy()[changed]},
+        source="benchmark",
+        csv_path=inventory,
+    )
+
+    start = time.perf_counter()
+    result = agent.run_agent(config, incremental=True, dry_run=True)
+    wall = time.perf_counter() - start
+
+    return {
+        "changed_skus": len(changed),
+        "dirty_skus": result["incremental"]["dirty_skus"],
+        "wall_s": round(wall, 4),
+        "decisions": len(result["decisions"]),
+    }
+
+
+def run_case(
+    skus: int,
+    suppliers: int,
+    seed: int,
+    inventory_format: str = "arrow",
+    incremental: bool = False,
+    workers: int = 1,
+    shard_by: str = "category",
+) -> dict:
+    import ai.restock_agent as agent
+    from ai.ml.predict import predict_7_day_demand
+    from ai.inventory_store import convert_csv_to_arrow
+
+    owner_df, supplier_df = generate_catalog(skus, suppliers, seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inventory = Path(tmp) / "inventory.csv"
+        owner_df.to_csv(inventory, index=False)
+        del owner_df
+        if inventory_format == "arrow":
+            convert_csv_to_arrow(inventory)
+
+        agent.OWNER_INVENTORY = inventory
+        agent.supplier_inventory_collection = InMemorySupplierCollection(supplier_df)
+        agent.logger.disabled = True
+
+        config = {**agent_config(skus, suppliers), "collect_timings": True}
+        start = time.perf_counter()
+        result = agent.run_agent(
+            config, incremental=incremental, workers=workers, shard_by=shard_by, dry_run=True
+        )
+        wall = time.perf_counter() - start
+        # Idle pool workers are non-daemonic: left running they block this
+        # case process from exiting
+        agent.shutdown_shard_pool()
+
+        # Stage breakdown comes from run_agent's own StageTimer
+        timings = result["timings"]
+        stages = {name: t["seconds"] for name, t in timings.items() if name != "total"}
+        rows = {name: t["rows"] for name, t in timings.items() if name != "total"}
+
+        # Forecast on its own, outside the agent
+        frame = agent.load_owner_inventory()
+        start = time.perf_counter()
+        predict_7_day_demand(frame)
+        predict_only = time.perf_counter() - start
+
+        warm = warm_cycle(agent, inventory, config, seed) if incremental else None
+
+    return {
+        "skus": skus,
+        "suppliers": suppliers,
+        "inventory_format": inventory_format,
+        "incremental": warm,
+        "workers": workers,
+        "shard_by": shard_by if workers > 1 else None,
+        "offers": len(supplier_df),
+        "wall_s": round(wall, 4),
+        "predict_only_s": round(predict_only, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages_s": {k: round(v, 4) for k, v in stages.items()},
+        "stage_rows": rows,
+        "decisions": len(result["decisions"]),
+        "active_skus_processed": result.get("active_skus_processed"),
+        "total_spent": result.get("total_spent"),
+    }
+
+
+def _case_worker(queue, skus, suppliers, seed, options):
+    try:
+        queue.put(run_case(skus, suppliers, seed, **options))
+    except Exception as e:
+        queue.put({"skus": skus, "suppliers": suppliers, "error": repr(e)})
+
+
+def run_isolated(skus: int, suppliers: int, seed: int, options: dict) -> dict:
+    """Run one case in a fresh process so peak RSS belongs to that case."""
+    queue = mp.Queue()
+    proc = mp.Process(target=_case_worker, args=(queue, skus, suppliers, seed, options))
+    proc.start()
+
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except Empty:
+            if not proc.is_alive():
+                # Killed before reporting, e.g. by the OOM killer
+                result = {
+                    "skus": skus,
+                    "suppliers": suppliers,
+                    "error": f"worker exited with code {proc.exitcode}",
+                }
+                break
+
+    proc.join()
+    return result
+
+
+# ===============================
+# COMPARE TWO RUNS
+# ===============================
+def compare(old_path: Path, new_path: Path):
+    old = json.loads(old_path.read_text())
+    new = json.loads(new_path.read_text())
+
+    old_cases = {(r["skus"], r["suppliers"]): r for r in old["results"]}
+
+    print(f"{'skus':>10} {'sup':>4} {'old wall':>10} {'new wall':>10} {'Δ%':>8} {'old rss':>9} {'new rss':>9}")
+    for r in new["results"]:
+        o = old_cases.get((r["skus"], r["suppliers"]))
+        if not o or "error" in o or "error" in r:
+            print(f"{r['skus']:>10} {r['suppliers']:>4}  (no comparable result)")
+            continue
+
+        delta = (r["wall_s"] - o["wall_s"]) / o["wall_s"] * 100 if o["wall_s"] else 0.0
+        print(
+            f"{r['skus']:>10} {r['suppliers']:>4} {o['wall_s']:>10.3f} {r['wall_s']:>10.3f} "
+            f"{delta:>+7.1f}% {o['peak_rss_mb'] or '-':>9} {r['peak_rss_mb'] or '-':>9}"
+        )
+        for stage, secs in r["stages_s"].items():
+            before = o["stages_s"].get(stage)
+            if before is not None:
+                print(f"{'':>16}{stage:<24} {before:>9.3f} → {secs:.3f}")
+
+
+# ===============================
+# MAIN
+# ===============================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_agent on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--suppliers", type=int, nargs="+", default=DEFAULT_SUPPLIERS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--inventory-format", choices=["csv", "arrow"], default="arrow")
+    parser.add_argument("--incremental", action="store_true",
+                        help="run cycles incrementally and time a warm second cycle")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="forecast in a process pool of this size (sharded mode)")
+    parser.add_argument("--shard-by", choices=["category", "product"], default="category")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    options = {
+        "inventory_format": args.inventory_format,
+        "incremental": args.incremental,
+        "workers": args.workers,
+        "shard_by": args.shard_by,
+    }
+
+    if args.incremental and args.workers > 1:
+        parser.error("--incremental and --workers > 1 cannot be combined")
+
+    results = []
+    for skus in args.sizes:
+        for suppliers in args.suppliers:
+            print(f"⏱️  {skus:,} SKUs × {suppliers} suppliers ...", flush=True)
+            r = run_isolated(skus, suppliers, args.seed, options)
+            results.append(r)
+
+            if "error" in r:
+                print(f"   ❌ {r['error']}")
+                continue
+            print(f"   wall {r['wall_s']:.3f}s | peak RSS {r['peak_rss_mb']} MB | decisions {r['decisions']}")
+            for stage, secs in r["stages_s"].items():
+                print(f"     {stage:<24} {secs:.3f}s")
+            if r["incremental"]:
+                w = r["incremental"]
+                print(f"   warm cycle {w['wall_s']:.3f}s | {w['changed_skus']} changed, {w['dirty_skus']} re-forecast")
+
+    output = args.output or RESULTS_DIR / f"run_agent-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }, indent=2))
+
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # ai/scripts/load_supplier_inventory.py
 
 import sys
+from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
@@ -45,6 +46,7 @@ def load_supplier_inventory():
     print("🧹 Cleared old supplier inventory")
 
     total = 0
+    loaded_at = datetime.utcnow()
 
     for supplier_id, csv_path in SUPPLIERS.items():
         if not csv_path.exists():
@@ -67,6 +69,9 @@ def load_supplier_inventory():
             # ❌ REMOVE CSV-ONLY FIELD
             r.pop("current_stock", None)
 
+            # Lets running agents see the reload (supplier offer cache)
+            r["last_updated"] = loaded_at
+
         if records:
             supplier_inventory_collection.insert_many(records)
             print(f"✅ Loaded {len(records)} items for {supplier_id}")
@@ -1,10 +1,21 @@
 # in ai/scripts
 # python .\simulate_daily_sales.py
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+# -------------------------------------------------
+# FIX PYTHON PATH (PROJECT ROOT)
+# -------------------------------------------------
+ROOT_DIR = Path(__file__).resolve().parents[2]  # Stock_Easy/
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from ai.inventory_store import inventory_exists
+from ai.inventory_provider import INVENTORY
+
 # ===============================
 # CONFIG
 # ===============================
@@ -19,9 +30,9 @@ MIN_SALES = 0              # allow zero-sale days
 # LOAD INVENTORY
 # ===============================
 def load_inventory():
-    if not INVENTORY_PATH.exists():
+    if not inventory_exists(INVENTORY_PATH):
         raise FileNotFoundError("inventory.csv not found")
-    return pd.read_csv(INVENTORY_PATH)
+    return INVENTORY.get(INVENTORY_PATH)
 
 # ===============================
 # SIMULATE ONE DAY OF SALES
@@ -61,12 +72,22 @@ def main():
     df = load_inventory()
 
     before_total_stock = df["current_stock"].sum()
+    before_sales = df["daily_sales"].to_numpy()
 
     df = simulate_day(df)
 
     after_total_stock = df["current_stock"].sum()
 
-    df.to_csv(INVENTORY_PATH, index=False)
+    # Ledger entries only for SKUs whose stock or daily_sales changed
+    sold = df["daily_sales"].to_numpy()
+    changed = (sold > 0) | (sold != before_sales)
+    products = df["product"].to_numpy()[changed]
+    INVENTORY.record(
+        stock_delta=dict(zip(products, (-sold[changed]).tolist())),
+        source="sales",
+        daily_sales=dict(zip(products, sold[changed].tolist())),
+        csv_path=INVENTORY_PATH,
+    )
 
     print("🛒 Daily Sales Simulation Complete")
     print(f"📦 Stock Before: {before_total_stock}")
@@ -0,0 +1,91 @@
+import time
+from typing import Optional
+
+
+class _Stage:
+    __slots__ = ("name", "rows", "started", "seconds")
+
+    def __init__(self, name: str, rows: Optional[int]):
+        self.name = name
+        self.rows = rows
+        self.started = 0.0
+        self.seconds = 0.0
+
+
+class _NullStage:
+    """Shared no-op stage handed out when timing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _TimedStage:
+    __slots__ = ("stage",)
+
+    def __init__(self, stage: _Stage):
+        self.stage = stage
+
+    def __enter__(self) -> _Stage:
+        self.stage.started = time.perf_counter()
+        return self.stage
+
+    def __exit__(self, *exc):
+        self.stage.seconds += time.perf_counter() - self.stage.started
+        return False
+
+
+class StageTimer:
+    """
+    Wall-clock timings per agent stage, with optional row counts.
+
+        with timer.stage("forecast", rows=len(df)):
+            ...
+        with timer.stage("supplier_fetch") as s:
+            df = fetch()
+            s.rows = len(df)
+
+    When disabled, `stage()` returns one shared no-op context manager, so
+    instrumented code pays a method call and nothing else.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stages = {}
+        self._created = time.perf_counter()
+
+    def stage(self, name: str, rows: Optional[int] = None):
+        if not self.enabled:
+            return _NULL_STAGE
+
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(name, rows)
+        elif rows is not None:
+            stage.rows = rows
+        return _TimedStage(stage)
+
+    def as_dict(self) -> dict:
+        """{stage: {seconds, rows, rows_per_sec}} plus the overall total."""
+        timings = {}
+        for name, s in self._stages.items():
+            entry = {"seconds": round(s.seconds, 6), "rows": s.rows}
+            if s.rows is not None and s.seconds > 0:
+                entry["rows_per_sec"] = round(s.rows / s.seconds, 1)
+            timings[name] = entry
+
+        timings["total"] = {
+            "seconds": round(time.perf_counter() - self._created, 6),
+            "rows": None,
+        }
+        return timings
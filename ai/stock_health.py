@@ -0,0 +1,115 @@
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .default_config import DEFAULT_CONFIG
+
+# ===============================
+# BUCKETS
+# ===============================
+CRITICAL, LOW, HEALTHY = 0, 1, 2
+
+
+class StockHealth:
+    """
+    healthy / low / critical SKU counts, kept up to date incrementally.
+
+    `reset(frame)` classifies every row once. After that `apply(frame,
+    index, products)` re-classifies only the rows of the products whose
+    stock changed and moves them between counters, so a batch of k stock
+    deltas costs O(k). `counts()` is a plain read.
+
+    A SKU is critical at or below `critical_at` units, low at or below
+    `low_at`, healthy above it. Changing thresholds re-classifies once.
+    """
+
+    def __init__(
+        self,
+        low_at: int = DEFAULT_CONFIG["stock_health_low_at"],
+        critical_at: int = DEFAULT_CONFIG["stock_health_critical_at"],
+    ):
+        self._lock = threading.Lock()
+        self.low_at = low_at
+        self.critical_at = critical_at
+        self._buckets = np.empty(0, dtype=np.int8)
+        self._counts = np.zeros(3, dtype=np.int64)
+        self._stock = None
+
+    def _classify(self, stock: np.ndarray) -> np.ndarray:
+        buckets = np.full(len(stock), HEALTHY, dtype=np.int8)
+        buckets[stock <= self.low_at] = LOW
+        buckets[stock <= self.critical_at] = CRITICAL
+        return buckets
+
+    # -------------------------------
+    # FEED (called by InventoryProvider)
+    # -------------------------------
+    def reset(self, frame: pd.DataFrame):
+        stock = frame["current_stock"].to_numpy()
+        with self._lock:
+            self._stock = stock
+            self._buckets = self._classify(stock)
+            self._counts = np.bincount(self._buckets, minlength=3).astype(np.int64)
+
+    def apply(self, frame: pd.DataFrame, index: pd.Index, products: Iterable[str]):
+        products = list(products)
+        if not products:
+            return
+
+        # Rows of the changed products (all of them when a product repeats)
+        pos = index.get_indexer_for(products)
+        pos = pos[pos >= 0]
+        if not len(pos):
+            return
+
+        stock = frame["current_stock"].to_numpy()
+        with self._lock:
+            if len(stock) != len(self._buckets):
+                # Different frame shape: not a delta of what we classified
+                self._stock = stock
+                self._buckets = self._classify(stock)
+                self._counts = np.bincount(self._buckets, minlength=3).astype(np.int64)
+                return
+
+            old = self._buckets[pos]
+            new = self._classify(stock[pos])
+            self._counts -= np.bincount(old, minlength=3)
+            self._counts += np.bincount(new, minlength=3)
+            self._buckets[pos] = new
+            self._stock = stock
+
+    # -------------------------------
+    # CONFIG
+    # -------------------------------
+    def configure(self, low_at: Optional[int] = None, critical_at: Optional[int] = None):
+        low_at = self.low_at if low_at is None else int(low_at)
+        critical_at = self.critical_at if critical_at is None else int(critical_at)
+        if critical_at > low_at:
+            raise ValueError("critical threshold must not exceed the low threshold")
+
+        with self._lock:
+            if (low_at, critical_at) == (self.low_at, self.critical_at):
+                return
+            self.low_at, self.critical_at = low_at, critical_at
+            if self._stock is not None:
+                self._buckets = self._classify(self._stock)
+                self._counts = np.bincount(self._buckets, minlength=3).astype(np.int64)
+
+    # -------------------------------
+    # READ
+    # -------------------------------
+    def counts(self) -> dict:
+        with self._lock:
+            return {
+                "healthy": int(self._counts[HEALTHY]),
+                "low": int(self._counts[LOW]),
+                "critical": int(self._counts[CRITICAL]),
+            }
+
+    def thresholds(self) -> dict:
+        return {"low_at": self.low_at, "critical_at": self.critical_at}
+
+
+STOCK_HEALTH = StockHealth()
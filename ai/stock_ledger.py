@@ -0,0 +1,304 @@
+# ai/stock_ledger.py
+#
+# python -m ai.stock_ledger compact   # fold the ledger into the inventory snapshot
+#
+# Stock changes (restocks, daily sales) are appended to
+# inventory.ledger, one JSON line per changed SKU, instead of rewriting the
+# whole inventory file. Readers apply the ledger on top of the snapshot;
+# compaction folds it in and empties it.
+
+import os
+import sys
+import json
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .inventory_store import INVENTORY_CSV, load_inventory, save_inventory, inventory_stamp
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ===============================
+# CONFIG
+# ===============================
+COMPACT_AFTER_BYTES = 4 * 1024 * 1024
+
+
+# ===============================
+# FOLDING
+# ===============================
+class LedgerChanges:
+    """Net effect of a run of ledger lines: stock deltas and daily_sales values."""
+
+    __slots__ = ("stock_delta", "daily_sales")
+
+    def __init__(self):
+        self.stock_delta: Dict[str, int] = {}
+        self.daily_sales: Dict[str, int] = {}
+
+    def add(self, entry: dict):
+        product = entry["product"]
+        delta = entry.get("stock_delta")
+        if delta:
+            self.stock_delta[product] = self.stock_delta.get(product, 0) + delta
+        if "daily_sales" in entry:
+            self.daily_sales[product] = entry["daily_sales"]
+
+    def __bool__(self) -> bool:
+        return bool(self.stock_delta or self.daily_sales)
+
+
+def _apply_column(
+    frame: pd.DataFrame,
+    index: pd.Index,
+    column: str,
+    values: Dict[str, int],
+    add: bool,
+):
+    if not values:
+        return
+
+    if index.is_unique:
+        pos = index.get_indexer(list(values))
+        vals = np.fromiter(values.values(), dtype=np.int64, count=len(values))
+        keep = pos >= 0
+        col = frame[column].to_numpy(dtype=np.int64, copy=True)
+        if add:
+            col[pos[keep]] += vals[keep]
+        else:
+            col[pos[keep]] = vals[keep]
+        frame[column] = col
+    else:
+        # Duplicate product rows all take the change, like .loc[mask]
+        mapped = frame["product"].map(values)
+        if add:
+            frame[column] = frame[column] + mapped.fillna(0).astype(np.int64)
+        else:
+            frame[column] = mapped.fillna(frame[column]).astype(np.int64)
+
+
+def apply_changes(frame: pd.DataFrame, changes: LedgerChanges, index: Optional[pd.Index] = None):
+    """
+    Apply `changes` to `frame` in place, locating SKUs through `index`
+    (product → row position, built from frame["product"] if omitted).
+    """
+    if index is None:
+        index = pd.Index(frame["product"])
+    _apply_column(frame, index, "current_stock", changes.stock_delta, add=True)
+    _apply_column(frame, index, "daily_sales", changes.daily_sales, add=False)
+
+
+# ===============================
+# FILE LOCK
+# ===============================
+@contextmanager
+def _file_lock(path: Path):
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ===============================
+# STOCK LEDGER
+# ===============================
+class StockLedger:
+    """
+    Append-only stock delta log next to one inventory snapshot.
+
+    Every operation takes an exclusive file lock, so concurrent writers
+    (the API, simulate_daily_sales) never interleave or lose lines.
+    Compaction writes the folded snapshot to a temp file, records it in a
+    marker, swaps it in and only then empties the ledger; `_recover`
+    finishes or rolls back a compaction that was interrupted half-way, so
+    a crash never applies a delta twice or drops one.
+    """
+
+    def __init__(self, csv_path: Path = INVENTORY_CSV):
+        self.csv_path = Path(csv_path)
+        self.path = self.csv_path.with_suffix(".ledger")
+        self.lock_path = self.csv_path.with_suffix(".ledger.lock")
+        self.marker_path = self.csv_path.with_suffix(".ledger.compacting")
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    # -------------------------------
+    # UNDER LOCK
+    # -------------------------------
+    def _recover(self):
+        if not self.marker_path.exists():
+            return
+
+        tmp = json.loads(self.marker_path.read_text())["snapshot_tmp"]
+        if os.path.exists(tmp):
+            # Crashed before the swap: old snapshot and ledger still agree
+            os.remove(tmp)
+        else:
+            # Crashed after the swap: the ledger is already folded in
+            self._truncate()
+        self.marker_path.unlink()
+
+    def _truncate(self):
+        with open(self.path, "wb") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read(self, offset: int) -> Tuple[LedgerChanges, int]:
+        changes = LedgerChanges()
+        if not self.path.exists():
+            return changes, 0
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        # A torn final line (crash mid-append) is not part of the log
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line:
+                changes.add(json.loads(line))
+        return changes, offset + end
+
+    def _commit_snapshot(self, frame: pd.DataFrame):
+        def mark(tmp):
+            self.marker_path.write_text(json.dumps({"snapshot_tmp": tmp}))
+
+        try:
+            save_inventory(frame, self.csv_path, before_replace=mark)
+        except Exception:
+            # The swap failed and the temp file is gone: without this the
+            # marker would read as "swapped" and the next _recover would
+            # empty a ledger that was never folded in
+            self.marker_path.unlink(missing_ok=True)
+            raise
+        self._truncate()
+        self.marker_path.unlink()
+
+    # -------------------------------
+    # PUBLIC
+    # -------------------------------
+    def load(self) -> Tuple[pd.DataFrame, tuple, int]:
+        """(snapshot with the ledger applied, snapshot stamp, ledger offset)."""
+        with _file_lock(self.lock_path):
+            self._recover()
+            frame = load_inventory(self.csv_path)
+            stamp = inventory_stamp(self.csv_path)
+            changes, offset = self._read(0)
+
+        apply_changes(frame, changes)
+        return frame, stamp, offset
+
+    def tail(self, offset: int, stamp: tuple) -> Optional[Tuple[LedgerChanges, int]]:
+        """
+        Changes appended since `offset`, or None if the snapshot is no
+        longer the one `stamp` describes (compacted meanwhile).
+        """
+        with _file_lock(self.lock_path):
+            if self.marker_path.exists() or inventory_stamp(self.csv_path) != stamp:
+                return None
+            if self.size() < offset:
+                return None
+            return self._read(offset)
+
+    def append(
+        self,
+        stock_delta: Dict[str, int],
+        source: str,
+        daily_sales: Optional[Dict[str, int]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Log one batch of changes, one line per SKU. Returns the (start,
+        end) byte offsets the batch occupies.
+        """
+        daily_sales = daily_sales or {}
+        at = datetime.utcnow().isoformat()
+
+        lines = []
+        for product in {**stock_delta, **daily_sales}:
+            entry = {"product": product, "source": source, "at": at}
+            if stock_delta.get(product):
+                entry["stock_delta"] = int(stock_delta[product])
+            if product in daily_sales:
+                entry["daily_sales"] = int(daily_sales[product])
+            lines.append(json.dumps(entry, ensure_ascii=False))
+
+        payload = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+        with _file_lock(self.lock_path):
+            self._recover()
+            with open(self.path, "ab") as f:
+                start = f.tell()
+                if start:
+                    # Drop a torn line left by a crashed writer
+                    with open(self.path, "rb") as r:
+                        r.seek(start - 1)
+                        if r.read(1) != b"\n":
+                            r.seek(0)
+                            start = r.read().rfind(b"\n") + 1
+                    f.truncate(start)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return start, start + len(payload)
+
+    def compact(self) -> Tuple[pd.DataFrame, tuple]:
+        """Fold the ledger into the snapshot. Returns (frame, snapshot stamp)."""
+        with _file_lock(self.lock_path):
+            self._recover()
+            frame = load_inventory(self.csv_path)
+            changes, _ = self._read(0)
+            if changes:
+                apply_changes(frame, changes)
+                self._commit_snapshot(frame)
+            elif self.size():
+                self._truncate()
+            return frame, inventory_stamp(self.csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Owner inventory stock ledger")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--csv", type=Path, default=INVENTORY_CSV)
+    args = parser.parse_args()
+
+    ledger = StockLedger(args.csv)
+    before = ledger.size()
+    try:
+        ledger.compact()
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"🗜️ Compacted {before} ledger bytes into {args.csv.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+OFFER_COLUMNS = ["product", "supplier_id", "supplier_cost", "available_stock"]
+
+
+# ===============================
+# SERVER-SIDE OFFER QUERY
+# ===============================
+def cheapest_offer_pipeline(allowed_suppliers: list) -> list:
+    """
+    Aggregation over supplier_inventory that groups offers per product,
+    cheapest first. Offers with no stock can never be bought and are
+    dropped server-side. Uses the (supplier_id, supplier_cost) index for
+    the $match.
+    """
+    return [
+        {"$match": {
+            "supplier_id": {"$in": allowed_suppliers},
+            "available_stock": {"$gt": 0},
+        }},
+        {"$sort": {"product": 1, "supplier_cost": 1, "supplier_id": 1}},
+        {"$group": {
+            "_id": "$product",
+            "offers": {"$push": {
+                "supplier_id": "$supplier_id",
+                "supplier_cost": "$supplier_cost",
+                "available_stock": "$available_stock",
+            }},
+        }},
+    ]
+
+
+def fetch_cheapest_offers(collection, allowed_suppliers: list) -> pd.DataFrame:
+    """
+    Run `cheapest_offer_pipeline` and flatten the per-product groups into
+    one offer per row, grouped by product and cost-ordered within each.
+    """
+    products, supplier_ids, costs, stock = [], [], [], []
+
+    for doc in collection.aggregate(
+        cheapest_offer_pipeline(allowed_suppliers), allowDiskUse=True
+    ):
+        for offer in doc["offers"]:
+            products.append(doc["_id"])
+            supplier_ids.append(offer["supplier_id"])
+            costs.append(offer["supplier_cost"])
+            stock.append(offer["available_stock"])
+
+    return pd.DataFrame({
+        "product": products,
+        "supplier_id": supplier_ids,
+        "supplier_cost": pd.Series(costs, dtype=np.float64),
+        "available_stock": pd.Series(stock, dtype=np.int64),
+    }, columns=OFFER_COLUMNS)
+
+
+# ===============================
+# SUPPLIER OFFER INDEX
+# ===============================
+class SupplierOfferIndex:
+    """
+    Product → cost-sorted supplier offers, built once per cycle.
+
+    Offers for each product live in one contiguous slice of flat arrays,
+    ordered by supplier_cost. Alongside the stock column we keep a running
+    max of available_stock per slice, which is non-decreasing, so the
+    cheapest offer with enough stock is a single bisect: O(log k) per SKU
+    instead of a boolean mask over the whole supplier frame.
+    """
+
+    def __init__(self, products, supplier_ids, costs, stock):
+        """
+        Arrays must already be grouped by product and cost-sorted within
+        each product (see `from_frame`).
+        """
+        products = np.asarray(products, dtype=object)
+        stock = np.asarray(stock, dtype=np.int64)
+
+        starts = np.flatnonzero(
+            np.r_[True, products[1:] != products[:-1]]
+        ) if len(products) else np.array([], dtype=np.int64)
+        ends = np.r_[starts[1:], len(products)]
+
+        group = np.repeat(np.arange(len(starts)), ends - starts)
+        stock_max = pd.Series(stock).groupby(group).cummax().to_numpy()
+
+        self._supplier_ids = list(supplier_ids)
+        self._costs = np.asarray(costs, dtype=np.float64).tolist()
+        self._stock = stock.tolist()
+        self._stock_max = stock_max.tolist()
+        self._slices = {
+            products[s]: (int(s), int(e))
+            for s, e in zip(starts, ends)
+        }
+        self._min_costs = pd.Series(
+            np.asarray(costs, dtype=np.float64)[starts],
+            index=products[starts],
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        supplier_df: pd.DataFrame,
+        presorted: bool = False,
+    ) -> "SupplierOfferIndex":
+        """
+        presorted: rows are already grouped by product and cost-ordered,
+        as `fetch_cheapest_offers` returns them.
+        """
+        if supplier_df.empty:
+            return cls([], [], [], [])
+
+        ordered = supplier_df if presorted else supplier_df.sort_values(
+            ["product", "supplier_cost"], kind="mergesort"
+        )
+        return cls(
+            ordered["product"].to_numpy(),
+            ordered["supplier_id"].to_numpy(),
+            ordered["supplier_cost"].to_numpy(dtype=np.float64),
+            ordered["available_stock"].to_numpy(dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self._slices)
+
+    def __contains__(self, product) -> bool:
+        return product in self._slices
+
+    def min_costs(self) -> pd.Series:
+        """Product → lowest unit cost on offer, regardless of stock."""
+        return self._min_costs
+
+    def cheapest(self, product, min_stock: int) -> Optional[Tuple[str, float]]:
+        """
+        Cheapest offer for `product` with available_stock >= min_stock.
+        Returns (supplier_id, unit_cost) or None.
+        """
+        bounds = self._slices.get(product)
+        if bounds is None:
+            return None
+
+        start, end = bounds
+        pos = bisect_left(self._stock_max, min_stock, start, end)
+        if pos == end:
+            return None
+
+        # stock_max first reaches min_stock exactly at the first
+        # (cheapest) offer that holds enough stock on its own
+        return self._supplier_ids[pos], self._costs[pos]
+
+    def decrement(self, product, supplier_id: str, qty: int) -> bool:
+        """
+        Take `qty` units off one offer in place, e.g. after a purchase, and
+        repair the running stock max of that product's slice.
+        """
+        bounds = self._slices.get(product)
+        if bounds is None:
+            return False
+
+        start, end = bounds
+        for pos in range(start, end):
+            if self._supplier_ids[pos] == supplier_id:
+                break
+        else:
+            return False
+
+        self._stock[pos] = max(self._stock[pos] - qty, 0)
+
+        running = 0
+        for i in range(start, end):
+            running = max(running, self._stock[i])
+            self._stock_max[i] = running
+        return True
+
+
+# ===============================
+# SUPPLIER OFFER CACHE
+# ===============================
+def offer_stamp() -> datetime:
+    """`last_updated` value for offer writes, at MongoDB's millisecond precision."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+class CachedOffers:
+    """One cached offer frame plus its lazily built SupplierOfferIndex."""
+
+    __slots__ = ("frame", "_index", "_rows")
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self._index = None
+        self._rows = None
+
+    def index(self) -> SupplierOfferIndex:
+        if self._index is None:
+            self._index = SupplierOfferIndex.from_frame(self.frame, presorted=True)
+        return self._index
+
+    def decrement(self, product, supplier_id: str, qty: int):
+        if self._rows is None:
+            self._rows = {
+                key: row for row, key in enumerate(
+                    zip(self.frame["product"], self.frame["supplier_id"])
+                )
+            }
+
+        row = self._rows.get((product, supplier_id))
+        if row is None:
+            return
+
+        col = self.frame.columns.get_loc("available_stock")
+        self.frame.iat[row, col] = max(int(self.frame.iat[row, col]) - qty, 0)
+
+        if self._index is not None:
+            self._index.decrement(product, supplier_id, qty)
+
+
+class SupplierOfferCache:
+    """
+    In-process cache of supplier offers, one entry per set of allowed
+    suppliers.
+
+    Entries are valid for one version of supplier_inventory: the highest
+    `last_updated` seen plus the document count. Checking the version
+    costs an indexed find_one and a metadata count instead of a full
+    fetch. Stock this process takes itself (see `decrement`) is applied to
+    the cached entries in place, and its `last_updated` stamps are
+    excluded from the version check, so purchases do not force a reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._entries = {}
+        self._high_water = None
+        self._count = None
+        self._own_stamps = set()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    # -------------------------------
+    # VERSIONING
+    # -------------------------------
+    def _changed(self, collection) -> bool:
+        if self._count is None:
+            return True
+
+        if collection.estimated_document_count() != self._count:
+            return True
+
+        newer = {"$nin": list(self._own_stamps)}
+        if self._high_water is None:
+            newer["$exists"] = True
+        else:
+            newer["$gt"] = self._high_water
+
+        return collection.find_one({"last_updated": newer}, {"_id": 1}) is not None
+
+    def _load_version(self, collection):
+        latest = collection.find_one(
+            {"last_updated": {"$exists": True}},
+            {"_id": 0, "last_updated": 1},
+            sort=[("last_updated", -1)],
+        )
+        self._high_water = latest["last_updated"] if latest else None
+        self._count = collection.estimated_document_count()
+
+    def _revalidate(self, collection):
+        if self._changed(collection):
+            self._entries.clear()
+            self._own_stamps.clear()
+            # Version first: writes racing the fetch show up next time
+            self._load_version(collection)
+            self._generation += 1
+
+    def version(self, collection) -> int:
+        """
+        Bumped whenever the offers may have changed: an outside write to
+        supplier_inventory, a local `decrement`, or `invalidate`.
+        """
+        with self._lock:
+            self._revalidate(collection)
+            return self._generation
+
+    # -------------------------------
+    # ACCESS
+    # -------------------------------
+    def get(
+        self,
+        collection,
+        allowed_suppliers: list,
+        fetch: Callable[[list], pd.DataFrame],
+    ) -> Tuple[CachedOffers, bool]:
+        """
+        Cached offers for `allowed_suppliers`, calling `fetch` on a miss.
+        Returns (entry, hit).
+        """
+        key = frozenset(allowed_suppliers)
+
+        with self._lock:
+            self._revalidate(collection)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry, True
+
+            self.misses += 1
+            entry = self._entries[key] = CachedOffers(fetch(list(allowed_suppliers)))
+            return entry, False
+
+    def decrement(self, product, supplier_id: str, qty: int, stamp: Optional[datetime] = None):
+        """
+        Apply a stock decrement this process wrote to MongoDB. `stamp` is
+        the `last_updated` value that write set.
+        """
+        with self._lock:
+            if stamp is not None:
+                self._own_stamps.add(stamp)
+            self._generation += 1
+            for key, entry in self._entries.items():
+                if supplier_id in key:
+                    entry.decrement(product, supplier_id, qty)
+
+    def restore(self, product, supplier_id: str, qty: int, stamp: Optional[datetime] = None):
+        """Undo a `decrement` whose stock this process released again."""
+        self.decrement(product, supplier_id, -qty, stamp)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._count = None
+            self._generation += 1
+
+
+SUPPLIER_OFFER_CACHE = SupplierOfferCache()
@@ -0,0 +1,126 @@
+import os
+import json
+import asyncio
+import itertools
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+# ===============================
+# SETTINGS
+# ===============================
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", 32))
+WS_SEND_TIMEOUT_S = float(os.getenv("WS_SEND_TIMEOUT_S", 5))
+
+# Close code for evicted clients: "try again later"
+CLOSE_TRY_AGAIN = 1013
+
+
+class _Client:
+    __slots__ = ("websocket", "queue", "task")
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+
+
+class WebSocketFanout:
+    """
+    Pushes dashboard events to every connected WebSocket.
+
+    Each client has its own bounded queue drained by its own sender task,
+    so a slow socket only delays itself. A client whose queue is full, or
+    whose send fails or exceeds WS_SEND_TIMEOUT_S, is evicted; it
+    reconnects and re-fetches. Events are encoded once and carry a `seq`
+    so a client can tell it missed one and fall back to a full refresh.
+
+    `publish` must run on the event loop; `publish_threadsafe` can be
+    called from job threads.
+    """
+
+    def __init__(self, queue_size: int = WS_QUEUE_SIZE, send_timeout: float = WS_SEND_TIMEOUT_S):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[WebSocket, _Client] = {}
+        self._seq = itertools.count(1)
+        self.sent = 0
+        self.evicted_slow = 0
+        self.evicted_dead = 0
+
+    # -------------------------------
+    # Connections
+    # -------------------------------
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        self.loop = asyncio.get_running_loop()
+
+        client = _Client(websocket, self.queue_size)
+        client.task = asyncio.create_task(self._sender(client))
+        self._clients[websocket] = client
+
+    def disconnect(self, websocket: WebSocket):
+        client = self._clients.pop(websocket, None)
+        if client is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    # -------------------------------
+    # Publishing
+    # -------------------------------
+    def publish(self, event: dict) -> int:
+        """Queue `event` for every client. Returns the event's seq."""
+        seq = next(self._seq)
+        message = json.dumps({**event, "seq": seq}, default=str)
+
+        for client in list(self._clients.values()):
+            try:
+                client.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.evicted_slow += 1
+                self._evict(client)
+        return seq
+
+    def publish_threadsafe(self, event: dict):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return  # nobody has connected yet
+        loop.call_soon_threadsafe(self.publish, event)
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "sent": self.sent,
+            "evicted_slow": self.evicted_slow,
+            "evicted_dead": self.evicted_dead,
+        }
+
+    # -------------------------------
+    # Internals
+    # -------------------------------
+    async def _sender(self, client: _Client):
+        while True:
+            message = await client.queue.get()
+            try:
+                await asyncio.wait_for(client.websocket.send_text(message), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.evicted_dead += 1
+                self._evict(client)
+                return
+            self.sent += 1
+
+    def _evict(self, client: _Client):
+        self.disconnect(client.websocket)
+        asyncio.ensure_future(self._close(client.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=CLOSE_TRY_AGAIN)
+        except Exception:
+            pass
+
+
+WS_FANOUT = WebSocketFanout()
@@ -64,4 +64,12 @@ def frontend_to_agent_config(frontend_cfg: dict) -> dict:
 
         "supplier_address_map": supplier_address_map,
         "supplier_budget_split": supplier_budget_split,
+
+        # Dashboard stock-health thresholds (units)
+        "stock_health_low_at": int(
+            frontend_cfg.get("stockHealthLow", DEFAULT_CONFIG["stock_health_low_at"])
+        ),
+        "stock_health_critical_at": int(
+            frontend_cfg.get("stockHealthCritical", DEFAULT_CONFIG["stock_health_critical_at"])
+        ),
     }
@@ -1,8 +1,21 @@
+import os
+import threading
 from datetime import datetime
+from pathlib import Path
+from bson import json_util
+from pymongo.errors import BulkWriteError
 from backend.db import config_collection, agent_decisions_collection
 
 CONFIG_ID = "GLOBAL_AGENT_CONFIG"
 STATS_ID = "GLOBAL_AGENT_STATS"
+DUPLICATE_KEY = 11000
+
+# Write-behind: transactions held in memory before the rest spills to disk
+WRITE_BEHIND_MAX_BUFFERED = int(os.getenv("WRITE_BEHIND_MAX_BUFFERED", 5000))
+WRITE_BEHIND_SPILL_PATH = Path(os.getenv(
+    "WRITE_BEHIND_SPILL_PATH",
+    Path(__file__).resolve().parent / "write_behind.spill.jsonl",
+))
 
 
 def save_config(config: dict):
@@ -48,10 +61,236 @@ def save_transaction(tx: dict):
     })
 
 
-def load_transactions(limit=50):
-    cursor = agent_decisions_collection.find().sort("timestamp", -1).limit(limit)
-    txs = []
-    for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        txs.append(doc)
-    return txs
+# Fields the API returns; created_at and _id stay in MongoDB
+TRANSACTION_FIELDS = {
+    "_id": 0,
+    "cycle_id": 1,
+    "product": 1,
+    "supplier_id": 1,
+    "amount_wei": 1,
+    "tx_hash": 1,
+    "timestamp": 1,
+}
+
+
+def transaction_cursor(tx: dict) -> str:
+    """Page cursor for `load_transactions`: the last transaction's (timestamp, tx_hash)."""
+    return f"{tx['timestamp']}|{tx['tx_hash']}"
+
+
+def transaction_sort_key(tx: dict):
+    """Newest-first order of `load_transactions`, for pages built in memory."""
+    return tx["timestamp"], tx["tx_hash"]
+
+
+def load_transactions(limit=50, before=None):
+    """
+    Newest first, at most `limit`. `before` is a cursor from
+    `transaction_cursor()` on the last transaction of a page. tx_hash
+    breaks timestamp ties, so payments recorded in the same instant are
+    neither skipped nor repeated across pages. Served from the
+    (timestamp, tx_hash) index, so cost does not grow with history.
+    """
+    # Read-your-writes for anything still buffered
+    try:
+        flush_writes()
+    except Exception as e:
+        print(f"⚠️ Could not flush buffered writes before reading transactions: {e}")
+
+    query = {}
+    if before:
+        timestamp, _, tx_hash = before.partition("|")
+        if tx_hash:
+            query = {"$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "tx_hash": {"$lt": tx_hash}},
+            ]}
+        else:
+            # Bare timestamp cursor
+            query = {"timestamp": {"$lt": timestamp}}
+
+    cursor = (
+        agent_decisions_collection.find(query, TRANSACTION_FIELDS)
+        .sort([("timestamp", -1), ("tx_hash", -1)])
+        .limit(limit)
+    )
+    return list(cursor)
+
+
+# ===============================
+# WRITE-BEHIND BUFFER
+# ===============================
+class WriteBehindBuffer:
+    """
+    Defers stats and transaction writes off the payment path.
+
+    Stats coalesce: only the latest value is kept and written as one
+    upsert. Transactions queue up and go out in one insert_many. Reaching
+    `max_pending` queued transactions flushes inline. A failed flush keeps
+    what still needs writing for the next attempt; documents that already
+    landed are dropped, not retried.
+
+    Memory is capped at `max_buffered` transactions. They record money
+    that has already moved, so past the cap they are neither dropped nor
+    refused: they spill to a JSON-lines file that the next flush drains
+    (also after a restart). Only if that file cannot be written do they
+    stay in memory.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 500,
+        max_buffered: int = WRITE_BEHIND_MAX_BUFFERED,
+        spill_path: Path = WRITE_BEHIND_SPILL_PATH,
+    ):
+        self.max_pending = max_pending
+        self.max_buffered = max(max_buffered, max_pending)
+        self.spill_path = Path(spill_path)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats = None
+        self._transactions = []
+        self._spilled = _count_lines(self.spill_path)
+
+    def queue_stats(self, stats: dict):
+        with self._lock:
+            self._stats = (dict(stats), datetime.utcnow())
+
+    def queue_transaction(self, tx: dict):
+        with self._lock:
+            self._transactions.append({**tx, "created_at": datetime.utcnow()})
+            self._spill_overflow()
+            # Only on reaching the threshold: after a failed flush the queue
+            # stays above it and waits for the next flush_writes()
+            full = len(self._transactions) == self.max_pending
+        if full:
+            try:
+                self.flush()
+            except Exception as e:
+                # Still queued; the caller's money has already moved
+                print(f"⚠️ Write-behind flush failed, {self.pending()} writes pending: {e}")
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._transactions) + self._spilled + (self._stats is not None)
+
+    def flush(self):
+        """
+        Write everything queued. Stats and transactions are written
+        independently, so one failing does not hold back the other; the
+        first error is re-raised after both were attempted.
+        """
+        # One flusher at a time keeps stats upserts in order
+        with self._flush_lock:
+            with self._lock:
+                transactions, self._transactions = self._take_spilled() + self._transactions, []
+                stats, self._stats = self._stats, None
+
+            errors = []
+            if transactions:
+                try:
+                    agent_decisions_collection.insert_many(transactions, ordered=False)
+                except Exception as e:
+                    retry = _failed_inserts(transactions, e)
+                    if retry or not isinstance(e, BulkWriteError):
+                        errors.append(e)
+                    # else: only duplicates of earlier partial inserts
+                    self._requeue_transactions(retry)
+
+            if stats:
+                values, updated_at = stats
+                try:
+                    config_collection.update_one(
+                        {"_id": STATS_ID},
+                        {"$set": {"stats": values, "updated_at": updated_at}},
+                        upsert=True,
+                    )
+                except Exception as e:
+                    errors.append(e)
+                    with self._lock:
+                        # Newer stats queued meanwhile win over the failed ones
+                        if self._stats is None:
+                            self._stats = stats
+
+            if errors:
+                raise errors[0]
+
+    def _requeue_transactions(self, transactions: list):
+        if transactions:
+            with self._lock:
+                self._transactions[:0] = transactions
+                self._spill_overflow()
+
+    # -------------------------------
+    # Disk spill (under self._lock)
+    # -------------------------------
+    def _spill_overflow(self):
+        overflow = len(self._transactions) - self.max_buffered
+        if overflow <= 0:
+            return
+
+        spill = self._transactions[-overflow:]
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for tx in spill:
+                    f.write(json_util.dumps(tx) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"⚠️ Could not spill {overflow} buffered transactions to disk: {e}")
+            return
+
+        del self._transactions[-overflow:]
+        self._spilled += overflow
+
+    def _take_spilled(self) -> list:
+        if not self._spilled:
+            return []
+
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            # A torn final line (crash mid-spill) was never acknowledged
+            spilled = [json_util.loads(line) for line in f if line.endswith("\n")]
+        os.remove(self.spill_path)
+        self._spilled = 0
+        return spilled
+
+
+def _count_lines(path: Path) -> int:
+    try:
+        with open(path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+    except FileNotFoundError:
+        return 0
+
+
+def _failed_inserts(transactions: list, error: Exception) -> list:
+    """
+    Documents of a failed unordered insert_many worth retrying. insert_many
+    stamps _id on every doc, so a doc that already landed comes back as a
+    duplicate key (E11000) on retry: those are done, not failed.
+    """
+    if not isinstance(error, BulkWriteError):
+        # Unknown outcome (e.g. network): retry all, landed ones dedupe as E11000
+        return transactions
+
+    failed = {
+        e["index"] for e in error.details.get("writeErrors", [])
+        if e.get("code") != DUPLICATE_KEY
+    }
+    # ordered=False: the server attempted every doc, so unlisted ones landed
+    return [tx for i, tx in enumerate(transactions) if i in failed]
+
+
+WRITE_BEHIND = WriteBehindBuffer()
+
+
+def queue_stats(stats: dict):
+    WRITE_BEHIND.queue_stats(stats)
+
+
+def queue_transaction(tx: dict):
+    WRITE_BEHIND.queue_transaction(tx)
+
+
+def flush_writes():
+    WRITE_BEHIND.flush()
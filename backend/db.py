@@ -3,7 +3,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient
 
 # -------------------------------------------------
 # Load backend/.env explicitly (Windows-safe)
@@ -40,3 +40,24 @@ supplier_inventory_collection = db["supplier_inventory"]
 
 # Agent decisions / audit trail
 agent_decisions_collection = db["agent_decisions"]
+
+
+# -------------------------------------------------
+# INDEXES
+# -------------------------------------------------
+def ensure_indexes():
+    """Create the indexes the agent's queries rely on (idempotent)."""
+    # Offer lookups per product, and one offer per (product, supplier)
+    supplier_inventory_collection.create_index(
+        [("product", ASCENDING), ("supplier_id", ASCENDING)]
+    )
+    # $match on allowed suppliers in the cheapest-offer aggregation
+    supplier_inventory_collection.create_index(
+        [("supplier_id", ASCENDING), ("supplier_cost", ASCENDING)]
+    )
+    # Version probe of the in-process supplier offer cache
+    supplier_inventory_collection.create_index([("last_updated", ASCENDING)])
+    # Newest-first transaction pages (/transactions?before=)
+    agent_decisions_collection.create_index(
+        [("timestamp", DESCENDING), ("tx_hash", DESCENDING)]
+    )
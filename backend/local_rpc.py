@@ -0,0 +1,129 @@
+# backend/local_rpc.py
+#
+# python -m backend.local_rpc --port 8545 --balance-pol 5 --latency-ms 200
+#
+# Stand-in JSON-RPC node for local runs and tests: point POLYGON_RPC_URL at
+# http://127.0.0.1:8545 and the payment path works without a real chain.
+# Answers single and batched requests and counts HTTP round trips.
+
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAIN_ID = 80002  # Polygon Amoy
+
+
+class LocalChain:
+    def __init__(self, balance_wei: int, gas_price_wei: int, latency_s: float = 0.0):
+        self.balance_wei = balance_wei
+        self.gas_price_wei = gas_price_wei
+        self.latency_s = latency_s
+        self.nonces = {}
+        self.round_trips = 0
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def answer(self, request: dict) -> dict:
+        method = request.get("method")
+        params = request.get("params") or []
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == "eth_getBalance":
+            result = hex(self.balance_wei)
+        elif method == "eth_gasPrice":
+            result = hex(self.gas_price_wei)
+        elif method == "eth_getTransactionCount":
+            result = hex(self.nonces.get(params[0].lower(), 0) if params else 0)
+        elif method == "eth_chainId":
+            result = hex(CHAIN_ID)
+        elif method == "eth_blockNumber":
+            result = hex(int(time.time()) // 2)
+        elif method == "net_version":
+            result = str(CHAIN_ID)
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {"code": -32601, "message": f"Method not found: {method}"},
+            }
+
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+
+def _handler(chain: LocalChain):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a real node
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with chain.lock:
+                chain.round_trips += 1
+            if chain.latency_s:
+                time.sleep(chain.latency_s)
+
+            payload = json.loads(body)
+            if isinstance(payload, list):
+                reply = [chain.answer(r) for r in payload]
+            else:
+                reply = chain.answer(payload)
+
+            data = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@contextmanager
+def serve(
+    port: int = 0,
+    balance_wei: int = 10**18,
+    gas_price_wei: int = 30 * 10**9,
+    latency_s: float = 0.0,
+):
+    """Run a LocalChain in a background thread. Yields (url, chain)."""
+    chain = LocalChain(balance_wei, gas_price_wei, latency_s)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(chain))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", chain
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in JSON-RPC node")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--balance-pol", type=float, default=1.0)
+    parser.add_argument("--gas-gwei", type=float, default=30)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    with serve(
+        args.port,
+        balance_wei=int(args.balance_pol * 10**18),
+        gas_price_wei=int(args.gas_gwei * 10**9),
+        latency_s=args.latency_ms / 1000,
+    ) as (url, chain):
+        print(f"⛓️ Local RPC listening on {url} (chain id {CHAIN_ID})")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"\n🔴 Stopped after {chain.round_trips} round trips: {chain.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# backend/payment_executor.py
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, List, Optional, Tuple
+
+from backend.payments import send_payment, check_smart_account_balance, rpc
+
+# ------------------------------
+# Deadlines / pool size
+# ------------------------------
+# A cycle holds the restock job worker until its payments settle
+PAYMENT_CALL_TIMEOUT_S = float(os.getenv("PAYMENT_CALL_TIMEOUT_S", 8))
+PAYMENT_CYCLE_TIMEOUT_S = float(os.getenv("PAYMENT_CYCLE_TIMEOUT_S", 20))
+PAYMENT_WORKERS = int(os.getenv("PAYMENT_WORKERS", 8))
+
+# ------------------------------
+# Outcome statuses
+# ------------------------------
+PAID = "paid"
+FAILED = "failed"            # raised: nothing was sent
+TIMED_OUT = "timed_out"      # started, no answer by its deadline: outcome unknown
+CANCELLED = "cancelled"      # never started before the cycle deadline
+SKIPPED = "skipped"          # running balance could not cover it
+
+
+class PaymentExecutor:
+    """
+    Submits a cycle's payments concurrently on a bounded thread pool.
+
+    The balance is read once per cycle and tracked locally: each payment
+    is debited from the running balance before it is submitted, and
+    refunded if it fails. Every call has its own deadline from the moment
+    it starts; the cycle has an overall deadline after which queued
+    payments are cancelled and running ones are reported as timed out.
+
+    A call that times out keeps its thread until it returns. So that it
+    does not take a slot from the next cycle, a cycle that abandoned calls
+    leaves them on the old pool and starts a fresh one.
+
+    A timed-out payment may still go through. Pass `on_late(index, tx)` to
+    `run` to account for payments that complete after the cycle returned.
+    `on_late_failure(index, error)` is called when such a payment fails
+    after all, so its reservation can be released.
+    `on_outcome(index, status)` is called as each payment's outcome is
+    settled, for progress reporting.
+    """
+
+    def __init__(
+        self,
+        workers: int = PAYMENT_WORKERS,
+        call_timeout: float = PAYMENT_CALL_TIMEOUT_S,
+        cycle_timeout: float = PAYMENT_CYCLE_TIMEOUT_S,
+    ):
+        self.workers = workers
+        self.pool = self._new_pool()
+        self.call_timeout = call_timeout
+        self.cycle_timeout = cycle_timeout
+
+    def run(
+        self,
+        payments: List[Tuple[str, int]],
+        live: bool = False,
+        on_late: Optional[Callable[[int, dict], None]] = None,
+        on_outcome: Optional[Callable[[int, str], None]] = None,
+        on_late_failure: Optional[Callable[[int, BaseException], None]] = None,
+    ) -> dict:
+        """
+        payments: (to_address, amount_wei) pairs.
+
+        Returns {"outcomes": [...], "balance_wei", "spent_wei", "elapsed_s"}
+        with one outcome per payment, in input order:
+        {"status", "tx", "error"}.
+        """
+        started = time.monotonic()
+        cycle_deadline = started + self.cycle_timeout
+        outcomes = [{"status": CANCELLED, "tx": None, "error": None} for _ in payments]
+
+        if not payments:
+            return self._report(outcomes, None, 0, started)
+
+        # One balance read per cycle, under the same per-call deadline
+        balance_future = self.pool.submit(check_smart_account_balance)
+        try:
+            balance_wei, _ = balance_future.result(timeout=self.call_timeout)
+        except Exception as e:
+            error = "balance check timed out" if not balance_future.done() else repr(e)
+            if not balance_future.done():
+                self._retire_pool()
+            for outcome in outcomes:
+                outcome.update(status=FAILED, error=error)
+            return self._report(outcomes, None, 0, started)
+
+        lock = threading.Lock()
+        state = {"balance": int(balance_wei), "spent": 0}
+        call_started = {}
+
+        def submit(index: int, to_address: str, amount_wei: int):
+            with lock:
+                if amount_wei > state["balance"]:
+                    return None
+                state["balance"] -= amount_wei
+
+            def call():
+                call_started[index] = time.monotonic()
+                return send_payment(
+                    to_address=to_address,
+                    amount_wei=amount_wei,
+                    live=live,
+                    check_balance=False,
+                )
+
+            return self.pool.submit(call)
+
+        def report(index: int):
+            if on_outcome is not None:
+                on_outcome(index, outcomes[index]["status"])
+
+        pending = {}
+        for index, (to_address, amount_wei) in enumerate(payments):
+            future = submit(index, to_address, int(amount_wei))
+            if future is None:
+                outcomes[index]["status"] = SKIPPED
+                report(index)
+            else:
+                pending[future] = (index, int(amount_wei))
+
+        while pending:
+            now = time.monotonic()
+            if now >= cycle_deadline:
+                break
+
+            # Wake up at the earliest deadline of a running call. A call
+            # that starts while we wait has its deadline no earlier than
+            # now + call_timeout, so that caps the wait too.
+            next_deadline = min(cycle_deadline, now + self.call_timeout)
+            for future, (index, _) in pending.items():
+                if index in call_started:
+                    next_deadline = min(next_deadline, call_started[index] + self.call_timeout)
+
+            done, _ = wait(pending, timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index, amount_wei = pending.pop(future)
+                self._settle(future, index, amount_wei, outcomes, state, lock)
+                report(index)
+
+            now = time.monotonic()
+            for future, (index, amount_wei) in list(pending.items()):
+                if index in call_started and now - call_started[index] >= self.call_timeout:
+                    pending.pop(future)
+                    self._abandon(future, index, outcomes, on_late, on_late_failure)
+                    report(index)
+
+        # Cycle deadline: drop what never started, abandon what is running
+        for future, (index, amount_wei) in pending.items():
+            if future.cancel():
+                with lock:
+                    state["balance"] += amount_wei
+                outcomes[index]["status"] = CANCELLED
+            elif future.done():
+                self._settle(future, index, amount_wei, outcomes, state, lock)
+            else:
+                self._abandon(future, index, outcomes, on_late, on_late_failure)
+            report(index)
+
+        abandoned = any(o["status"] == TIMED_OUT for o in outcomes)
+        if abandoned:
+            self._retire_pool()
+
+        # Money left (or may have left): the next cycle re-reads the balance
+        if state["spent"] or abandoned:
+            rpc.invalidate()
+
+        return self._report(outcomes, int(balance_wei), state["spent"], started)
+
+    # ------------------------------
+    # Helpers
+    # ------------------------------
+    def _new_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="payment")
+
+    def _retire_pool(self):
+        # Running calls finish on the old pool and still fire their callbacks
+        self.pool.shutdown(wait=False)
+        self.pool = self._new_pool()
+
+    @staticmethod
+    def _settle(future, index, amount_wei, outcomes, state, lock):
+        try:
+            tx = future.result()
+        except Exception as e:
+            with lock:
+                state["balance"] += amount_wei
+            outcomes[index].update(status=FAILED, error=repr(e))
+            return
+
+        with lock:
+            state["spent"] += amount_wei
+        outcomes[index].update(status=PAID, tx=tx)
+
+    @staticmethod
+    def _abandon(future, index, outcomes, on_late, on_late_failure):
+        # Keep the amount debited: the payment may still go through
+        outcomes[index].update(status=TIMED_OUT, error="payment deadline exceeded")
+
+        def late(f):
+            error = f.exception() if not f.cancelled() else None
+            try:
+                if error is None:
+                    if on_late is not None:
+                        on_late(index, f.result())
+                elif on_late_failure is not None:
+                    on_late_failure(index, error)
+            except Exception as e:
+                print(f"⚠️ Late payment callback failed for payment {index}: {e}")
+
+        future.add_done_callback(late)
+
+    @staticmethod
+    def _report(outcomes, balance_wei, spent_wei, started) -> dict:
+        counts = {}
+        for outcome in outcomes:
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+
+        return {
+            "outcomes": outcomes,
+            "counts": counts,
+            "balance_wei": balance_wei,
+            "spent_wei": spent_wei,
+            "elapsed_s": round(time.monotonic() - started, 3),
+        }
+
+
+PAYMENT_EXECUTOR = PaymentExecutor()
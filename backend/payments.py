@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 from web3 import Web3
 from datetime import datetime
 
+from backend.rpc import RpcClient, make_session
+
 
 
 
@@ -22,16 +24,20 @@ CHAIN_ID = int(os.getenv("CHAIN_ID", 80002))  # 80002 = Polygon Amoy
 # ------------------------------
 # Connect to Polygon RPC
 # ------------------------------
-w3 = Web3(Web3.HTTPProvider(POLYGON_RPC_URL))
+# One keep-alive pool shared by web3 and the batched/cached reads below
+RPC_SESSION = make_session()
+w3 = Web3(Web3.HTTPProvider(POLYGON_RPC_URL, session=RPC_SESSION))
+rpc = RpcClient(POLYGON_RPC_URL, session=RPC_SESSION)
 
 # ------------------------------
 # Check Smart Account balance
 # ------------------------------
-def check_smart_account_balance():
+def check_smart_account_balance(max_age=None):
+    """Balance from the cached account state (one batched RPC per TTL)."""
     if not SMART_ACCOUNT_ADDRESS:
         raise ValueError("SMART_ACCOUNT_ADDRESS not set in .env")
 
-    balance_wei = w3.eth.get_balance(SMART_ACCOUNT_ADDRESS)
+    balance_wei = rpc.account_state(SMART_ACCOUNT_ADDRESS, max_age)["balance_wei"]
     balance_pol = w3.from_wei(balance_wei, "ether")
     return balance_wei, balance_pol
 
@@ -40,14 +46,17 @@ def check_smart_account_balance():
 # ------------------------------
 def estimate_gas(amount_wei=None):
     gas_limit = 21000
-    gas_price = w3.eth.gas_price
+    if SMART_ACCOUNT_ADDRESS:
+        gas_price = rpc.account_state(SMART_ACCOUNT_ADDRESS)["gas_price_wei"]
+    else:
+        gas_price = w3.eth.gas_price
     total_gas = gas_limit * gas_price
     return total_gas, w3.from_wei(total_gas, "ether")
 
 # ------------------------------
 # Send payment (simulated for Smart Account)
 # ------------------------------
-def send_payment(to_address=None, amount_wei=None, live=False):
+def send_payment(to_address=None, amount_wei=None, live=False, check_balance=True):
     """
     Sends POL payment using Smart Account (simulation).
 
@@ -55,6 +64,8 @@ def send_payment(to_address=None, amount_wei=None, live=False):
         to_address (str): Supplier address
         amount_wei (int): Amount in wei
         live (bool): False = simulate / True = real transaction
+        check_balance (bool): query the balance first; batch callers that
+            track a running balance themselves pass False
 
     Returns:
         dict: {'tx_hash': str, 'amount_wei': int, 'link': str}
@@ -74,9 +85,10 @@ def send_payment(to_address=None, amount_wei=None, live=False):
     amount_wei = int(amount_wei)
 
     # Check balance
-    bal_wei, bal_pol = check_smart_account_balance()
-    if amount_wei > bal_wei:
-        raise ValueError(f"Insufficient balance: have {bal_pol} POL")
+    if check_balance:
+        bal_wei, bal_pol = check_smart_account_balance()
+        if amount_wei > bal_wei:
+            raise ValueError(f"Insufficient balance: have {bal_pol} POL")
 
     if not live:
         # Demo mode: fake TX hash
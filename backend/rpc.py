@@ -0,0 +1,131 @@
+# backend/rpc.py
+import os
+import time
+import threading
+import itertools
+from typing import List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ------------------------------
+# Settings
+# ------------------------------
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", 10))
+RPC_TIMEOUT_S = float(os.getenv("RPC_TIMEOUT_S", 10))
+RPC_CACHE_TTL_S = float(os.getenv("RPC_CACHE_TTL_S", 5))
+
+
+class RpcError(Exception):
+    def __init__(self, method: str, error: dict):
+        super().__init__(f"{method}: {error.get('message', error)}")
+        self.method = method
+        self.code = error.get("code")
+
+
+def make_session(pool_size: int = RPC_POOL_SIZE) -> requests.Session:
+    """HTTP session with a keep-alive connection pool sized for the payment workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RpcClient:
+    """
+    Minimal JSON-RPC client over a pooled session.
+
+    `batch` sends several calls in one HTTP round trip. `account_state`
+    fetches balance, gas price and nonce in one batch and caches the
+    answer for RPC_CACHE_TTL_S, so a payment cycle reads them once.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        timeout: float = RPC_TIMEOUT_S,
+        cache_ttl: float = RPC_CACHE_TTL_S,
+    ):
+        self.url = url
+        self.session = session or make_session()
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._accounts = {}
+        self.round_trips = 0
+
+    # ------------------------------
+    # Transport
+    # ------------------------------
+    def _post(self, payload):
+        self.round_trips += 1
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def call(self, method: str, params: list = None):
+        return self.batch([(method, params or [])])[0]
+
+    def batch(self, calls: List[Tuple[str, list]]) -> list:
+        """Results of `calls`, in order, from a single HTTP request."""
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in zip(ids, calls)
+        ]
+
+        replies = self._post(payload)
+        if isinstance(replies, dict):
+            # Some nodes answer a rejected batch with one error object
+            raise RpcError("batch", replies.get("error", replies))
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for i, (method, _) in zip(ids, calls):
+            reply = by_id.get(i)
+            if reply is None:
+                raise RpcError(method, {"message": "missing from batch reply"})
+            if "error" in reply:
+                raise RpcError(method, reply["error"])
+            results.append(reply["result"])
+        return results
+
+    # ------------------------------
+    # Cached account state
+    # ------------------------------
+    def account_state(self, address: str, max_age: Optional[float] = None) -> dict:
+        """
+        {"balance_wei", "gas_price_wei", "nonce", "fetched_at"} for
+        `address`, at most `max_age` (default cache_ttl) seconds old.
+        """
+        max_age = self.cache_ttl if max_age is None else max_age
+
+        with self._lock:
+            cached = self._accounts.get(address)
+            if cached and time.monotonic() - cached["fetched_at"] <= max_age:
+                return cached
+
+            balance, gas_price, nonce = self.batch([
+                ("eth_getBalance", [address, "latest"]),
+                ("eth_gasPrice", []),
+                ("eth_getTransactionCount", [address, "pending"]),
+            ])
+            state = {
+                "balance_wei": int(balance, 16),
+                "gas_price_wei": int(gas_price, 16),
+                "nonce": int(nonce, 16),
+                "fetched_at": time.monotonic(),
+            }
+            self._accounts[address] = state
+            return state
+
+    def invalidate(self, address: Optional[str] = None):
+        with self._lock:
+            if address is None:
+                self._accounts.clear()
+            else:
+                self._accounts.pop(address, None)
@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from backend.db import supplier_inventory_collection
+
+# Reservation ids kept per supplier_inventory document, newest last.
+# Only needed long enough to read back which updates of a batch applied.
+RESERVATION_HISTORY = 16
+
+
+def reserve_stock(
+    requests: List[Tuple[str, str, int]],
+    stamp: Optional[datetime] = None,
+) -> List[bool]:
+    """
+    Conditionally decrement available_stock for (product, supplier_id, qty)
+    requests in one unordered bulk_write. Each decrement is atomic on its
+    document and only applies while available_stock >= qty.
+
+    Returns one flag per request: False for those that lost the race.
+    """
+    if not requests:
+        return []
+
+    stamp = stamp or datetime.utcnow()
+    batch = uuid.uuid4().hex[:12]
+    ids = [f"{batch}-{i}" for i in range(len(requests))]
+
+    ops = [
+        UpdateOne(
+            {
+                "product": product,
+                "supplier_id": supplier_id,
+                "available_stock": {"$gte": qty},
+            },
+            {
+                "$inc": {"available_stock": -qty},
+                "$set": {"last_updated": stamp},
+                "$push": {"reservation_ids": {"$each": [rid], "$slice": -RESERVATION_HISTORY}},
+            },
+        )
+        for (product, supplier_id, qty), rid in zip(requests, ids)
+    ]
+
+    result = supplier_inventory_collection.bulk_write(ops, ordered=False)
+    if result.modified_count == len(ops):
+        return [True] * len(ops)
+
+    # Some decrements did not apply: read back which ids landed. The
+    # product filter lets this use the (product, supplier_id) index
+    # instead of scanning every document for reservation_ids.
+    products = list({product for product, _, _ in requests})
+    applied = set()
+    for doc in supplier_inventory_collection.find(
+        {"product": {"$in": products}, "reservation_ids": {"$in": ids}},
+        {"_id": 0, "reservation_ids": 1},
+    ):
+        applied.update(doc["reservation_ids"])
+
+    return [rid in applied for rid in ids]
+
+
+def release_stock(
+    requests: List[Tuple[str, str, int]],
+    stamp: Optional[datetime] = None,
+) -> int:
+    """Give back reserved (product, supplier_id, qty) stock, e.g. after a failed payment."""
+    if not requests:
+        return 0
+
+    stamp = stamp or datetime.utcnow()
+    result = supplier_inventory_collection.bulk_write(
+        [
+            UpdateOne(
+                {"product": product, "supplier_id": supplier_id},
+                {"$inc": {"available_stock": qty}, "$set": {"last_updated": stamp}},
+            )
+            for product, supplier_id, qty in requests
+        ],
+        ordered=False,
+    )
+    return result.modified_count
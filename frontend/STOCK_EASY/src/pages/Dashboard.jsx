@@ -217,11 +217,33 @@ function Dashboard() {
     console.log("🔌 Attempting WebSocket connection to:", wsUrl);
     const socket = new WebSocket(wsUrl);
 
+    // Deltas carry a sequence number: a gap means we missed one, so re-fetch everything
+    let lastSeq = null;
+
     socket.onmessage = (event) => {
-      if (event.data === "refresh_dashboard") {
-        console.log("🚀 Real-time update received!");
+      let msg;
+      try {
+        msg = JSON.parse(event.data);
+      } catch (e) {
+        return;
+      }
+      if (msg?.type !== "dashboard_delta") return;
+
+      console.log("🚀 Real-time update received!");
+      const missed = lastSeq !== null && msg.seq !== lastSeq + 1;
+      lastSeq = msg.seq;
+
+      if (missed) {
         fetchAgentData(false); // Update without flashing
         fetchConfig();
+        return;
+      }
+
+      if (msg.spend) {
+        setDashboardStats((prev) => ({ ...prev, ...msg.spend }));
+      }
+      if (msg.preview_changed) {
+        fetchAgentData(false); // Cheap: revalidates with the cached ETag
       }
     };
 